@@ -0,0 +1,61 @@
+"""hot query indexes
+
+Revision ID: 4b7e2d91c0a3
+Revises: 9549a6aca82d
+Create Date: 2026-10-18 10:00:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "4b7e2d91c0a3"
+down_revision: Union[str, None] = "9549a6aca82d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_expense_user_id_created_at",
+            "expense",
+            ["user_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_expense_user_id_id",
+            "expense",
+            ["user_id", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_event_event_datetime",
+            "event",
+            ["event_datetime"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_event_user_id_event_datetime",
+            "event",
+            ["user_id", "event_datetime"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_category_aliases",
+            "category",
+            ["aliases"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_category_aliases", table_name="category", postgresql_concurrently=True)
+        op.drop_index("ix_event_user_id_event_datetime", table_name="event", postgresql_concurrently=True)
+        op.drop_index("ix_event_event_datetime", table_name="event", postgresql_concurrently=True)
+        op.drop_index("ix_expense_user_id_id", table_name="expense", postgresql_concurrently=True)
+        op.drop_index("ix_expense_user_id_created_at", table_name="expense", postgresql_concurrently=True)
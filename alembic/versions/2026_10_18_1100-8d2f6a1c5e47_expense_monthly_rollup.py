@@ -0,0 +1,136 @@
+"""expense monthly rollup
+
+Revision ID: 8d2f6a1c5e47
+Revises: 4b7e2d91c0a3
+Create Date: 2026-10-18 11:00:41.207518
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "8d2f6a1c5e47"
+down_revision: Union[str, None] = "4b7e2d91c0a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Триггеры уровня оператора с transition tables: COPY и массовые DELETE обновляют
+# агрегат одним запросом, а не построчно.
+ROLLUP_FUNCTION = """
+CREATE FUNCTION expense_monthly_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO expense_monthly_rollup (user_id, category_id, month, amount, expenses_count)
+        SELECT user_id, category_id, date_trunc('month', created_at AT TIME ZONE 'Europe/Moscow')::date,
+               sum(amount), count(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, category_id, month) DO UPDATE
+        SET amount = expense_monthly_rollup.amount + EXCLUDED.amount,
+            expenses_count = expense_monthly_rollup.expenses_count + EXCLUDED.expenses_count,
+            updated_at = now();
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO expense_monthly_rollup (user_id, category_id, month, amount, expenses_count)
+        SELECT user_id, category_id, date_trunc('month', created_at AT TIME ZONE 'Europe/Moscow')::date,
+               -sum(amount), -count(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, category_id, month) DO UPDATE
+        SET amount = expense_monthly_rollup.amount + EXCLUDED.amount,
+            expenses_count = expense_monthly_rollup.expenses_count + EXCLUDED.expenses_count,
+            updated_at = now();
+    ELSE
+        INSERT INTO expense_monthly_rollup (user_id, category_id, month, amount, expenses_count)
+        SELECT user_id, category_id, date_trunc('month', created_at AT TIME ZONE 'Europe/Moscow')::date,
+               sum(amount), sum(delta)
+        FROM (
+            SELECT user_id, category_id, created_at, amount, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT user_id, category_id, created_at, -amount, -1 FROM old_rows
+        ) AS changes
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, category_id, month) DO UPDATE
+        SET amount = expense_monthly_rollup.amount + EXCLUDED.amount,
+            expenses_count = expense_monthly_rollup.expenses_count + EXCLUDED.expenses_count,
+            updated_at = now();
+    END IF;
+    -- Месяц без расходов не хранится: иначе строка агрегата держала бы FK на пользователя и категорию.
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM expense_monthly_rollup
+        USING (
+            SELECT DISTINCT user_id, category_id,
+                   date_trunc('month', created_at AT TIME ZONE 'Europe/Moscow')::date AS month
+            FROM old_rows
+        ) AS changed
+        WHERE expense_monthly_rollup.user_id = changed.user_id
+          AND expense_monthly_rollup.category_id = changed.category_id
+          AND expense_monthly_rollup.month = changed.month
+          AND expense_monthly_rollup.expenses_count = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ROLLUP_TRIGGERS = (
+    """
+    CREATE TRIGGER expense_monthly_rollup_insert AFTER INSERT ON expense
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION expense_monthly_rollup_apply()
+    """,
+    """
+    CREATE TRIGGER expense_monthly_rollup_delete AFTER DELETE ON expense
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION expense_monthly_rollup_apply()
+    """,
+    """
+    CREATE TRIGGER expense_monthly_rollup_update AFTER UPDATE ON expense
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION expense_monthly_rollup_apply()
+    """,
+)
+
+ROLLUP_BACKFILL = """
+INSERT INTO expense_monthly_rollup (user_id, category_id, month, amount, expenses_count)
+SELECT user_id, category_id, date_trunc('month', created_at AT TIME ZONE 'Europe/Moscow')::date, sum(amount), count(*)
+FROM expense
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "expense_monthly_rollup",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("amount", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("expenses_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["category_id"], ["category.id"], name=op.f("fk_expense_monthly_rollup_category_id_category")
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], name=op.f("fk_expense_monthly_rollup_user_id_user")),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_expense_monthly_rollup")),
+        sa.UniqueConstraint(
+            "user_id", "category_id", "month", name=op.f("uq_expense_monthly_rollup_user_id_category_id_month")
+        ),
+    )
+    op.execute("LOCK TABLE expense IN SHARE MODE")
+    op.execute(ROLLUP_FUNCTION)
+    for trigger in ROLLUP_TRIGGERS:
+        op.execute(trigger)
+    op.execute(ROLLUP_BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER expense_monthly_rollup_update ON expense")
+    op.execute("DROP TRIGGER expense_monthly_rollup_delete ON expense")
+    op.execute("DROP TRIGGER expense_monthly_rollup_insert ON expense")
+    op.execute("DROP FUNCTION expense_monthly_rollup_apply()")
+    op.drop_table("expense_monthly_rollup")
@@ -0,0 +1,63 @@
+"""event occurrence functions
+
+Revision ID: e61b0d4a9c52
+Revises: 8d2f6a1c5e47
+Create Date: 2026-10-18 13:00:09.631842
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "e61b0d4a9c52"
+down_revision: Union[str, None] = "8d2f6a1c5e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Интервал принимается текстом, а не event_repeat_intervals: sync_enum_values пересоздаёт тип,
+# и зависящие от него функции мешали бы менять список интервалов.
+REPEAT_STEP_FUNCTION = """
+CREATE FUNCTION event_repeat_step(repeat_interval text) RETURNS interval
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE repeat_interval
+        WHEN 'DAILY' THEN interval '1 day'
+        WHEN 'WEEKLY' THEN interval '7 days'
+        WHEN 'MONTHLY' THEN interval '1 month'
+        WHEN 'SIXMONTH' THEN interval '6 months'
+        WHEN 'YEARLY' THEN interval '12 months'
+    END
+$$
+"""
+
+# Сколько шагов повторения уже наступило к моменту now. Для календарных шагов считается
+# по разнице в месяцах, для остальных по разнице в секундах; оценка, перескочившая now,
+# уменьшается на шаг. Для будущих и неповторяющихся событий возвращает 0.
+OCCURRENCES_PASSED_FUNCTION = """
+CREATE FUNCTION event_occurrences_passed(event_datetime timestamp, repeat_interval text, now timestamp)
+RETURNS integer
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT greatest(0, estimate - (event_datetime + step * estimate > now)::integer)
+    FROM (SELECT event_repeat_step(repeat_interval) AS step) AS s
+    CROSS JOIN LATERAL (
+        SELECT CASE
+            WHEN extract(day FROM s.step) = 0 THEN floor(
+                ((extract(year FROM now) - extract(year FROM event_datetime)) * 12
+                 + extract(month FROM now) - extract(month FROM event_datetime))
+                / (extract(year FROM s.step) * 12 + extract(month FROM s.step))
+            )
+            ELSE floor(extract(epoch FROM now - event_datetime) / extract(epoch FROM s.step))
+        END::integer AS estimate
+    ) AS e
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(REPEAT_STEP_FUNCTION)
+    op.execute(OCCURRENCES_PASSED_FUNCTION)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION event_occurrences_passed(timestamp, text, timestamp)")
+    op.execute("DROP FUNCTION event_repeat_step(text)")
@@ -0,0 +1,44 @@
+"""user timezone
+
+Revision ID: 5a8c1f3e9d62
+Revises: e61b0d4a9c52
+Create Date: 2026-10-18 14:00:41.208716
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "5a8c1f3e9d62"
+down_revision: Union[str, None] = "e61b0d4a9c52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Все события до сих пор вводились и хранились по московскому времени.
+LEGACY_TIMEZONE = "Europe/Moscow"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user",
+        sa.Column("timezone", sa.String(length=64), server_default=LEGACY_TIMEZONE, nullable=False),
+    )
+    op.alter_column(
+        "event",
+        "event_datetime",
+        type_=sa.DateTime(timezone=True),
+        postgresql_using=f"event_datetime AT TIME ZONE '{LEGACY_TIMEZONE}'",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "event",
+        "event_datetime",
+        type_=sa.DateTime(),
+        postgresql_using=f"event_datetime AT TIME ZONE '{LEGACY_TIMEZONE}'",
+    )
+    op.drop_column("user", "timezone")
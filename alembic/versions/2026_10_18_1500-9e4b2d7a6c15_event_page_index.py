@@ -0,0 +1,40 @@
+"""event page index
+
+Revision ID: 9e4b2d7a6c15
+Revises: 5a8c1f3e9d62
+Create Date: 2026-10-18 15:00:12.540387
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "9e4b2d7a6c15"
+down_revision: Union[str, None] = "5a8c1f3e9d62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Страницы событий пользователя читаются по ключу (event_datetime, id).
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_event_user_id_event_datetime_id",
+            "event",
+            ["user_id", "event_datetime", "id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_event_user_id_event_datetime", table_name="event", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_event_user_id_event_datetime",
+            "event",
+            ["user_id", "event_datetime"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_event_user_id_event_datetime_id", table_name="event", postgresql_concurrently=True)
@@ -1,24 +1,107 @@
+import asyncio
 import logging
 
+from prometheus_client import start_http_server
+from redis.asyncio import Redis
+from telegram import Update
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CommandHandler,
 )
 
 from src.configs import settings
+from src.core.persistence import RedisPersistence
+from src.database import db_helper
+from src.expense.catalog import category_catalog
 from src.expense.handlers import register_expense_handler
+from src.expense_statistics.cache import statistics_cache
 from src.expense_statistics.handlers import register_statistic_handler
 from src.handlers import start
+from src.instrumentation import InstrumentedRequest, UpdateInstrumentation, instrument_engine, registry
 from src.reminders.handlers import register_reminder_handler
+from src.update_processor import ChatOrderedUpdateProcessor
+from src.users.handlers import register_user_handler
 
 logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
 
+logger = logging.getLogger(__name__)
 
-if __name__ == "__main__":
-    application = ApplicationBuilder().token(settings.bot.token).build()
+
+async def on_startup(application: Application):
+    # Движок создаётся здесь, а не при импорте: соединения пула открываются вместе с загрузкой справочника.
+    instrument_engine(db_helper.engine)
+    await asyncio.gather(db_helper.warm_up(), category_catalog.refresh())
+    await category_catalog.start_listening()
+    if settings.bot.metrics.enabled:
+        metrics_settings = settings.bot.metrics
+        application.bot_data["metrics_server"], _ = start_http_server(
+            metrics_settings.port, metrics_settings.host, registry=registry
+        )
+        logger.info(f"Метрики доступны на http://{metrics_settings.host}:{metrics_settings.port}/metrics")
+
+
+async def on_shutdown(application: Application):
+    if "metrics_server" in application.bot_data:
+        application.bot_data["metrics_server"].shutdown()
+    await category_catalog.stop_listening()
+    await statistics_cache.close()
+    logger.info(f"Состояние пула соединений: {db_helper.pool_stats()}")
+    await db_helper.dispose()
+
+
+def build_application() -> Application:
+    update_processor = ChatOrderedUpdateProcessor(
+        max_concurrent_handlers=settings.bot.max_concurrent_updates or settings.database.bot_pool.pool_size,
+        max_pending_updates=settings.bot.max_pending_updates,
+    )
+    builder = (
+        ApplicationBuilder()
+        .token(settings.bot.token)
+        .base_url(settings.bot.api_base_url)
+        .request(InstrumentedRequest(connection_pool_size=256))
+        .concurrent_updates(update_processor)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if settings.bot.persistence.enabled:
+        redis = Redis(host=settings.redis.host, port=settings.redis.port, db=settings.redis.database)
+        builder = builder.persistence(
+            RedisPersistence(
+                redis,
+                key_prefix=settings.bot.persistence.key_prefix,
+                flush_interval=settings.bot.persistence.flush_interval,
+            )
+        )
+    application = builder.build()
     register_reminder_handler(application)
     register_expense_handler(application)
     register_statistic_handler(application)
+    register_user_handler(application)
     start_handler = CommandHandler("start", start)
     application.add_handler(start_handler)
-    application.run_polling()
+    UpdateInstrumentation(settings.bot.slow_update_threshold_ms / 1000).register(application)
+    return application
+
+
+def main():
+    application = build_application()
+    if settings.bot.mode == "webhook":
+        webhook = settings.bot.webhook
+        application.run_webhook(
+            listen=webhook.listen,
+            port=webhook.port,
+            url_path=webhook.url_path,
+            cert=webhook.cert_path,
+            key=webhook.key_path,
+            webhook_url=webhook.webhook_url,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=webhook.max_connections,
+            secret_token=webhook.secret_token,
+        )
+    else:
+        application.run_polling()
+
+
+if __name__ == "__main__":
+    main()
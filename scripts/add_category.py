@@ -1,10 +1,12 @@
 import asyncio
 import logging
 
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 
 from src.database import db_helper
 from src.database.models import Category
+from src.expense.catalog import CATEGORY_CATALOG_CHANNEL
 
 logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
 
@@ -145,6 +147,7 @@ categoryes = [
 
 async def add_category():
     session = db_helper.session_factory()
+    added = False
     for cat in categoryes:
         cat["aliases"].append(cat["name"])
         cat["aliases"] = list(map(lambda x: x.lower(), cat["aliases"]))
@@ -152,10 +155,15 @@ async def add_category():
         session.add(category)
         try:
             await session.commit()
+            added = True
             logger.info(f"Добавленна категория {cat['name']}.")
         except IntegrityError:
             logger.info(f"Категория {cat['name']} уже существует.")
             await session.rollback()
+    if added:
+        # Запущенные боты перечитают справочник категорий по уведомлению.
+        await session.execute(select(func.pg_notify(CATEGORY_CATALOG_CHANNEL, "")))
+        await session.commit()
     await session.close()
 
 
@@ -0,0 +1,29 @@
+"""Пересборка месячного агрегата расходов expense_monthly_rollup.
+
+Агрегат поддерживается триггерами на таблице expense; скрипт нужен, если агрегат
+разошёлся с расходами (ручные правки, восстановление из бэкапа).
+
+Запуск: python backfill_expense_rollup.py
+"""
+
+import asyncio
+import logging
+
+from src.core.unitofwork import get_uow
+from src.database import db_helper
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+
+async def backfill_expense_rollup():
+    async with get_uow() as uow:
+        await uow.expense.rebuild_monthly_rollup()
+        await uow.commit()
+    logger.info("Месячный агрегат расходов пересобран.")
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_expense_rollup())
@@ -0,0 +1,121 @@
+"""Сравнение обработки наступивших напоминаний построчно и наборами.
+
+Внутри транзакции создаёт заданное количество событий на текущие сутки по UTC (половина
+повторяющихся), затем выполняет работу check_events с базой старым способом
+(пользователь и UPDATE/DELETE на каждое событие) и новым (один запрос с join,
+один DELETE и один UPDATE). Каждый вариант выполняется в откатываемой точке
+сохранения, постановка задач в Redis не замеряется. Данные в базе не меняются.
+
+Запуск: python bench_check_events.py [количество событий]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.core.unitofwork import UnitOfWork
+from src.database import db_helper
+from src.database.models import Event
+from src.scheduler.utils import calculate_next_occurrence
+from src.utils import datetime_utc_now
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+BENCH_TG_ID = -100501
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO "user" (telegram_id, chat_id, name, is_active)
+    VALUES (:tg_id, :tg_id, 'bench', true)
+    """,
+    """
+    INSERT INTO event (event_datetime, description, message_count, repeat_interval, user_id)
+    SELECT date_trunc('day', now(), 'UTC') + (g % 1440) * interval '1 minute', 'bench', 1,
+           CASE WHEN g % 2 = 0 THEN 'DAILY'::event_repeat_intervals END, u.id
+    FROM "user" AS u
+    CROSS JOIN generate_series(1, :events_count) AS g
+    WHERE u.telegram_id = :tg_id
+    """,
+    "ANALYZE event",
+)
+
+
+def _today() -> tuple[datetime, datetime]:
+    now = datetime_utc_now()
+    return (
+        now.replace(hour=0, minute=0, second=0, microsecond=0),
+        now.replace(hour=23, minute=59, second=59, microsecond=999999),
+    )
+
+
+async def legacy_process(uow: UnitOfWork) -> int:
+    """Путь check_events до перехода на запросы наборами."""
+    result = await uow.session.execute(select(Event).where(Event.event_datetime.between(*_today())))
+    events = result.scalars().all()
+    for due_event in events:
+        await uow.user.get_by_id(due_event.user_id)
+        if due_event.repeat_interval is None:
+            await uow.event.delete(due_event.id)
+        else:
+            next_occurrence = calculate_next_occurrence(due_event.event_datetime, due_event.repeat_interval)
+            await uow.event.update(due_event.id, {"event_datetime": next_occurrence})
+    return len(events)
+
+
+async def set_based_process(uow: UnitOfWork) -> int:
+    _, end = _today()
+    events = await uow.event.claim_due_events(end, 2**31 - 1, datetime_utc_now())
+    finished_ids = [due_event.id for due_event in events if due_event.repeat_interval is None]
+    next_datetimes = {
+        due_event.id: due_event.next_occurrence for due_event in events if due_event.repeat_interval is not None
+    }
+    await uow.event.delete_by_ids(finished_ids)
+    await uow.event.reschedule(next_datetimes)
+    return len(events)
+
+
+async def run(connection: AsyncConnection, name: str, process: Callable[[UnitOfWork], Awaitable[int]]) -> None:
+    counter: Counter[str] = Counter()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    event.listen(connection.sync_connection, "before_cursor_execute", on_execute)
+    session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+    started = time.perf_counter()
+    try:
+        async with session.begin_nested() as savepoint:
+            events_count = await process(UnitOfWork(session))
+            elapsed = time.perf_counter() - started
+            await savepoint.rollback()
+    finally:
+        await session.close()
+        event.remove(connection.sync_connection, "before_cursor_execute", on_execute)
+
+    logger.info(f"{name}: {events_count} событий, {counter['statements']} запросов, {elapsed:.2f} с")
+
+
+async def main(events_count: int) -> None:
+    async with db_helper.engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            for statement in SEED_STATEMENTS:
+                await connection.execute(text(statement), {"tg_id": BENCH_TG_ID, "events_count": events_count})
+            await run(connection, "set-based", set_based_process)
+            await run(connection, "legacy", legacy_process)
+        finally:
+            await transaction.rollback()
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,99 @@
+"""Пропускная способность бота при параллельной обработке обновлений.
+
+Множество пользователей одновременно отправляют по несколько сообщений. Обработчик
+имитирует запрос к базе задержкой со случайным разбросом и отвечает через локальный
+Bot API из bench_update_latency. Замер выполняется для последовательной обработки
+(как раньше), для обработки без учёта чатов и для ChatOrderedUpdateProcessor с
+разным числом одновременных обработчиков. Для каждого варианта выводит время,
+обновления в секунду и число чатов, в которых нарушен порядок сообщений.
+
+Bot API работает в том же процессе, поэтому при большом числе обработчиков замер
+упирается в процессор самого скрипта, а не в обработку обновлений.
+
+Запуск: python bench_concurrent_updates.py [пользователей] [сообщений на пользователя] [запрос, мс]
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import defaultdict
+
+from bench_update_latency import BENCH_TOKEN, FIRST_CHAT_ID, FakeBotApi, _update
+from telegram import Update
+from telegram.ext import ApplicationBuilder, BaseUpdateProcessor, ContextTypes, MessageHandler, filters
+
+from src.configs import settings
+from src.update_processor import ChatOrderedUpdateProcessor
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING)
+
+logger = logging.getLogger(__file__)
+logger.setLevel(logging.INFO)
+
+
+async def run(
+    name: str, processor: BaseUpdateProcessor | int, users: int, messages: int, query_time: float
+) -> None:
+    api = FakeBotApi(rtt=0)
+    await api.start()
+    received: dict[int, list[int]] = defaultdict(list)
+    handled = 0
+    done = asyncio.Event()
+    total = users * messages
+
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        nonlocal handled
+        # Разброс времени запроса: без порядка внутри чата поздние сообщения обгоняли бы ранние.
+        await asyncio.sleep(query_time * random.uniform(0.5, 1.5))
+        received[update.effective_chat.id].append(update.message.message_id)
+        await update.message.reply_text("ok")
+        handled += 1
+        if handled == total:
+            done.set()
+
+    application = (
+        ApplicationBuilder().token(BENCH_TOKEN).base_url(api.base_url).updater(None).concurrent_updates(processor)
+    ).build()
+    application.add_handler(MessageHandler(filters.TEXT, handler))
+    await application.initialize()
+    await application.start()
+    try:
+        started = time.perf_counter()
+        update_id = 0
+        # Каждый пользователь отправляет свои сообщения подряд, как при быстром вводе в диалоге.
+        for user in range(users):
+            for _ in range(messages):
+                update_id += 1
+                update = Update.de_json(_update(update_id, FIRST_CHAT_ID + user), application.bot)
+                await application.update_queue.put(update)
+        await done.wait()
+        elapsed = time.perf_counter() - started
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await api.stop()
+
+    disordered = sum(ids != sorted(ids) for ids in received.values())
+    logger.info(f"{name:>28}: {elapsed:6.2f} с, {total / elapsed:7.0f} обновлений/с, порядок нарушен в {disordered} чатах")
+
+
+async def main(users: int, messages: int, query_ms: float):
+    query_time = query_ms / 1000
+    logger.info(f"{users} пользователей по {messages} сообщений, запрос к базе {query_ms:g} мс")
+    await run("последовательно", 1, users, messages, query_time)
+    pool_size = settings.database.bot_pool.pool_size
+    await run(f"без порядка, {pool_size}", pool_size, users, messages, query_time)
+    concurrency = 2
+    while concurrency <= pool_size:
+        processor = ChatOrderedUpdateProcessor(concurrency, settings.bot.max_pending_updates)
+        await run(f"по чатам, {concurrency}", processor, users, messages, query_time)
+        concurrency = min(concurrency * 2, pool_size) if concurrency < pool_size else pool_size + 1
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    query_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    asyncio.run(main(users, messages, query_ms))
@@ -0,0 +1,60 @@
+"""Сравнение постановки задач arq по одной и пачками через pipeline.
+
+Ставит заданное количество задач в отдельную очередь arq:bench сначала через
+ArqRedis.enqueue_job, затем через enqueue_jobs, и выводит время каждого способа.
+Очередь и задачи удаляются после замера.
+
+Запуск: python bench_enqueue.py [количество задач]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.constants import job_key_prefix
+
+from src.configs import settings
+from src.scheduler.enqueue import JobSpec, enqueue_jobs
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+BENCH_QUEUE = "arq:bench"
+
+
+def _jobs(count: int) -> list[JobSpec]:
+    defer_until = datetime.now() + timedelta(days=1)
+    return [JobSpec("send_reminder", (-1, i, "bench", defer_until), defer_until) for i in range(count)]
+
+
+async def cleanup(redis: ArqRedis):
+    job_ids = await redis.zrange(BENCH_QUEUE, 0, -1)
+    for start in range(0, len(job_ids), 10_000):
+        await redis.delete(*(job_key_prefix + job_id.decode() for job_id in job_ids[start : start + 10_000]))
+    await redis.delete(BENCH_QUEUE)
+
+
+async def main(count: int):
+    redis = await create_pool(RedisSettings(host=settings.redis.host, port=settings.redis.port))
+    jobs = _jobs(count)
+    try:
+        started = time.perf_counter()
+        for job in jobs:
+            await redis.enqueue_job(job.function, *job.args, _queue_name=BENCH_QUEUE, _defer_until=job.defer_until)
+        logger.info(f"enqueue_job: {count} задач за {time.perf_counter() - started:.2f} с")
+        await cleanup(redis)
+
+        stats = await enqueue_jobs(redis, jobs, queue_name=BENCH_QUEUE)
+        logger.info(f"enqueue_jobs: {stats.enqueued} задач за {stats.duration:.2f} с, пачек: {len(stats.batches)}")
+    finally:
+        await cleanup(redis)
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
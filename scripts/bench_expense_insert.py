@@ -0,0 +1,116 @@
+"""Сравнение количества обращений к базе при добавлении расхода.
+
+Добавляет расходы старым способом (категория, пользователь, commit, расход, commit)
+и через add_expense, считает запросы, транзакции и обращения к базе (запросы, BEGIN и
+COMMIT) на один расход и время вставки. Проверка соединения pool_pre_ping не учитывается.
+Созданные расходы и пользователи удаляются после замера.
+
+Запуск: python bench_expense_insert.py [количество расходов]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+
+from sqlalchemy import delete, event
+
+from src.core.unitofwork import get_uow
+from src.database import db_helper
+from src.database.models import Expense, ExpenseMonthlyRollup, User
+from src.expense.schemes import ExpenseCreateScheme
+from src.expense.service import add_expense
+from src.repository.user import user_id_cache
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+BENCH_TG_ID = -100500
+
+
+async def legacy_add_expense(new_expense: ExpenseCreateScheme, user_telegram_id: int) -> None:
+    """Путь добавления расхода до перехода на один запрос."""
+    async with get_uow() as uow:
+        category = await uow.category.get_category_by_alias(new_expense.category_name)
+        user = await uow.user.get_user_by_tg_id(user_telegram_id)
+        if not user:
+            user = await uow.user.add(
+                User(telegram_id=user_telegram_id, chat_id=user_telegram_id, name="bench", lastname=None)
+            )
+        await uow.commit()
+        await uow.expense.add(
+            Expense(
+                amount=new_expense.amount,
+                description=new_expense.description,
+                category_id=category.id,
+                user_id=user.id,
+            )
+        )
+        await uow.commit()
+
+
+async def fast_add_expense(new_expense: ExpenseCreateScheme, user_telegram_id: int) -> None:
+    await add_expense(new_expense, user_telegram_id, user_telegram_id, "bench", None)
+
+
+async def run(name: str, add, count: int) -> None:
+    counter: Counter[str] = Counter()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    def on_begin(conn):
+        counter["begin"] += 1
+
+    def on_commit(conn):
+        counter["commit"] += 1
+
+    engine = db_helper.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "begin", on_begin)
+    event.listen(engine, "commit", on_commit)
+    # Категория без псевдонима, чтобы оба пути проходили через откат на 'прочее'.
+    expense = ExpenseCreateScheme(amount=100.5, category_name="bench-unknown-category", description=None)
+    started = time.perf_counter()
+    try:
+        for _ in range(count):
+            await add(expense, BENCH_TG_ID)
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(engine, "begin", on_begin)
+        event.remove(engine, "commit", on_commit)
+
+    round_trips = counter["statements"] + counter["begin"] + counter["commit"]
+    logger.info(
+        f"{name}: {counter['statements'] / count:.2f} запросов, {counter['commit'] / count:.2f} транзакций, "
+        f"{round_trips / count:.2f} обращений к базе на расход, {elapsed / count * 1000:.2f} мс на расход"
+    )
+
+
+async def cleanup() -> None:
+    async with get_uow() as uow:
+        user = await uow.user.get_user_by_tg_id(BENCH_TG_ID)
+        if user:
+            await uow.session.execute(delete(Expense).where(Expense.user_id == user.id))
+            await uow.session.execute(delete(ExpenseMonthlyRollup).where(ExpenseMonthlyRollup.user_id == user.id))
+            await uow.session.delete(user)
+            await uow.commit()
+    user_id_cache.pop(BENCH_TG_ID)
+
+
+async def main(count: int) -> None:
+    try:
+        await cleanup()
+        await run("legacy", legacy_add_expense, count)
+        await cleanup()
+        await run("single statement (первый расход создаёт пользователя)", fast_add_expense, count)
+    finally:
+        await cleanup()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
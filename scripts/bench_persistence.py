@@ -0,0 +1,150 @@
+"""Пропускная способность бота с сохранением состояния диалогов в Redis и без него.
+
+Множество пользователей проходят диалог ConversationHandler из трёх шагов, каждый шаг
+записывает значение в user_data. Бот отвечает через локальный Bot API из
+bench_update_latency, обновления обрабатываются ChatOrderedUpdateProcessor. Замер
+выполняется без хранилища и с RedisPersistence при разных интервалах записи. Для
+каждого варианта выводит обновления в секунду и сколько раз и сколько ключей было
+записано в Redis. Затем проверяет, что незавершённые диалоги восстанавливаются из Redis
+новым экземпляром хранилища. Ключи замера удаляются после него.
+
+Запуск: python bench_persistence.py [пользователей] [сообщений на пользователя]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+from bench_update_latency import BENCH_TOKEN, FIRST_CHAT_ID, FakeBotApi, _update
+from redis.asyncio import Redis
+from telegram import Update
+from telegram.ext import ApplicationBuilder, ContextTypes, ConversationHandler, MessageHandler, filters
+
+from src.configs import settings
+from src.core.persistence import RedisPersistence
+from src.update_processor import ChatOrderedUpdateProcessor
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING)
+
+logger = logging.getLogger(__file__)
+logger.setLevel(logging.INFO)
+
+BENCH_PREFIX = "bench:persistence"
+DIALOG_STEPS = 3
+
+
+def _redis() -> Redis:
+    return Redis(host=settings.redis.host, port=settings.redis.port, db=settings.redis.database)
+
+
+def _dialog(on_handled, persistent: bool) -> ConversationHandler:
+    async def step(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        state = context.user_data.get("step", 0)
+        context.user_data["step"] = state + 1
+        context.user_data[f"answer_{state}"] = update.message.text
+        await update.message.reply_text("ok")
+        on_handled()
+        return ConversationHandler.END if state + 1 == DIALOG_STEPS else state + 1
+
+    async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        context.user_data.clear()
+        return await step(update, context)
+
+    text = filters.TEXT & ~filters.COMMAND
+    return ConversationHandler(
+        entry_points=[MessageHandler(text, start)],
+        states={index: [MessageHandler(text, step)] for index in range(1, DIALOG_STEPS)},
+        fallbacks=[],
+        name="bench_dialog",
+        persistent=persistent,
+    )
+
+
+async def run(name: str, flush_interval: float | None, users: int, messages: int) -> None:
+    api = FakeBotApi(rtt=0)
+    await api.start()
+    handled = 0
+    done = asyncio.Event()
+    total = users * messages
+
+    def on_handled():
+        nonlocal handled
+        handled += 1
+        if handled == total:
+            done.set()
+
+    persistence = None
+    builder = (
+        ApplicationBuilder()
+        .token(BENCH_TOKEN)
+        .base_url(api.base_url)
+        .updater(None)
+        .concurrent_updates(ChatOrderedUpdateProcessor(settings.database.bot_pool.pool_size, 10_000))
+    )
+    if flush_interval is not None:
+        persistence = RedisPersistence(_redis(), key_prefix=BENCH_PREFIX, flush_interval=flush_interval)
+        builder = builder.persistence(persistence)
+    application = builder.build()
+    application.add_handler(_dialog(on_handled, persistent=persistence is not None))
+
+    await application.initialize()
+    await application.start()
+    try:
+        started = time.perf_counter()
+        update_id = 0
+        for _ in range(messages):
+            for user in range(users):
+                update_id += 1
+                data = _update(update_id, FIRST_CHAT_ID + user)
+                data["message"]["text"] = f"answer {update_id}"
+                del data["message"]["entities"]
+                await application.update_queue.put(Update.de_json(data, application.bot))
+        await done.wait()
+        elapsed = time.perf_counter() - started
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await api.stop()
+
+    writes = f", записей в Redis {persistence.flushes}, ключей {persistence.flushed_writes}" if persistence else ""
+    logger.info(f"{name:>24}: {elapsed:6.2f} с, {total / elapsed:7.0f} обновлений/с{writes}")
+
+
+async def check_restore(users: int, messages: int):
+    persistence = RedisPersistence(_redis(), key_prefix=BENCH_PREFIX, flush_interval=1)
+    conversations = await persistence.get_conversations("bench_dialog")
+    user_data = await persistence.get_user_data()
+    await persistence.redis.aclose()
+    expected_state = messages % DIALOG_STEPS
+    expected = users if expected_state else 0
+    restored = sum(state == expected_state for state in conversations.values())
+    status = "OK" if restored == expected and len(user_data) == users else "ОШИБКА"
+    logger.info(f"Восстановлено диалогов: {restored} из {expected}, user_data: {len(user_data)}, {status}")
+
+
+async def cleanup():
+    redis = _redis()
+    keys = [key async for key in redis.scan_iter(f"{BENCH_PREFIX}:*")]
+    if keys:
+        await redis.delete(*keys)
+    await redis.aclose()
+
+
+async def main(users: int, messages: int):
+    logger.info(f"{users} пользователей по {messages} сообщений, диалог из {DIALOG_STEPS} шагов")
+    await cleanup()
+    try:
+        await run("без хранилища", None, users, messages)
+        for flush_interval in (0.01, 0.1, settings.bot.persistence.flush_interval):
+            await cleanup()
+            await run(f"Redis, раз в {flush_interval:g} с", flush_interval, users, messages)
+        await check_restore(users, messages)
+    finally:
+        await cleanup()
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(users, messages))
@@ -0,0 +1,106 @@
+"""Сравнение выборки строк через json_build_object и через типизированные колонки.
+
+Для 10, 1 000 и 100 000 синтетических строк выполняет запрос в двух вариантах:
+старый собирает JSON в базе и валидирует словари pydantic-схемой, новый выбирает
+колонки и раскладывает их в DTO. Выводит процессорное время клиента и пик
+выделенной памяти на полный путь от запроса до списка объектов.
+
+Запуск: python bench_row_projection.py [повторов]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from src.core.unitofwork import get_uow
+from src.database import db_helper
+from src.expense.schemes import ExpenseTopScheme
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+ROWS_COUNTS = (10, 1_000, 100_000)
+
+LEGACY_QUERY = text(
+    """
+    SELECT json_build_object(
+        'id', g,
+        'amount', (g % 100000)::numeric(10, 2),
+        'category_name', 'category-' || g % 20,
+        'created_at', now() - g * interval '1 minute',
+        'description', 'bench row ' || g
+    )
+    FROM generate_series(1, :rows_count) AS g
+    """
+)
+
+TYPED_QUERY = text(
+    """
+    SELECT g, (g % 100000)::numeric(10, 2)::float8, 'category-' || g % 20,
+           now() - g * interval '1 minute', 'bench row ' || g
+    FROM generate_series(1, :rows_count) AS g
+    """
+)
+
+
+class LegacyExpenseTopScheme(BaseModel):
+    """Схема, через которую проходили строки до перехода на DTO."""
+
+    id: int
+    amount: float
+    category_name: str
+    created_at: datetime
+    description: str | None
+
+
+async def legacy_rows(rows_count: int) -> list[Any]:
+    async with get_uow() as uow:
+        result = await uow.session.execute(LEGACY_QUERY, {"rows_count": rows_count})
+        return [LegacyExpenseTopScheme.model_validate(row) for row in result.scalars().all()]
+
+
+async def typed_rows(rows_count: int) -> list[Any]:
+    async with get_uow() as uow:
+        result = await uow.session.execute(TYPED_QUERY, {"rows_count": rows_count})
+        return [ExpenseTopScheme(*row) for row in result]
+
+
+async def measure(load: Callable[[int], Awaitable[list[Any]]], rows_count: int, repeats: int) -> tuple[float, int]:
+    """Возвращает среднее процессорное время в мс и пик памяти в КиБ."""
+    await load(rows_count)
+
+    started = time.process_time()
+    for _ in range(repeats):
+        await load(rows_count)
+    cpu_ms = (time.process_time() - started) * 1000 / repeats
+
+    tracemalloc.start()
+    await load(rows_count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak // 1024
+
+
+async def main(repeats: int) -> None:
+    for rows_count in ROWS_COUNTS:
+        runs = max(1, repeats * 1000 // rows_count) if rows_count < 100_000 else max(1, repeats // 10)
+        legacy_cpu, legacy_peak = await measure(legacy_rows, rows_count, runs)
+        typed_cpu, typed_peak = await measure(typed_rows, rows_count, runs)
+        logger.info(
+            f"{rows_count} строк: json_build_object {legacy_cpu:.2f} мс, {legacy_peak} КиБ; "
+            f"колонки {typed_cpu:.2f} мс, {typed_peak} КиБ; "
+            f"ускорение x{legacy_cpu / typed_cpu if typed_cpu else float('inf'):.1f}"
+        )
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
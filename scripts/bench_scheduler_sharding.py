@@ -0,0 +1,120 @@
+"""Масштабирование разбора напоминаний несколькими воркерами.
+
+Создаёт заданное количество событий на текущие сутки по UTC у отдельного пользователя и
+запускает разбор process_due_events в 1, 2, 4... процессах одновременно.
+Процессы делят события через FOR UPDATE SKIP LOCKED, задачи ставятся в отдельную
+очередь arq:bench-sharding. Для каждого числа процессов выводит время и
+пропускную способность, а также проверяет, что каждое событие разобрано ровно
+один раз. События, пользователь и задачи удаляются после замера.
+
+Запуск: python bench_scheduler_sharding.py [количество событий] [максимум процессов]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from arq import create_pool
+from arq.connections import RedisSettings
+from arq.constants import job_key_prefix
+from sqlalchemy import text
+
+from src.configs import settings
+from src.database import db_helper
+from src.scheduler.tasks import process_due_events
+from src.utils import datetime_utc_now
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING)
+
+logger = logging.getLogger(__file__)
+logger.setLevel(logging.INFO)
+
+BENCH_TG_ID = -100502
+BENCH_QUEUE = "arq:bench-sharding"
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO "user" (telegram_id, chat_id, name, is_active)
+    VALUES (:tg_id, :tg_id, 'bench', true)
+    """,
+    """
+    INSERT INTO event (event_datetime, description, message_count, user_id)
+    SELECT date_trunc('day', now(), 'UTC') + (g % 1440) * interval '1 minute', 'bench', 3, u.id
+    FROM "user" AS u
+    CROSS JOIN generate_series(1, :events_count) AS g
+    WHERE u.telegram_id = :tg_id
+    """,
+    "ANALYZE event",
+)
+
+CLEANUP_STATEMENTS = (
+    'DELETE FROM event WHERE user_id IN (SELECT id FROM "user" WHERE telegram_id = :tg_id)',
+    'DELETE FROM "user" WHERE telegram_id = :tg_id',
+)
+
+
+def _redis_settings() -> RedisSettings:
+    return RedisSettings(host=settings.redis.host, port=settings.redis.port)
+
+
+async def _execute(statements: tuple[str, ...], events_count: int = 0):
+    async with db_helper.engine.begin() as connection:
+        for statement in statements:
+            await connection.execute(text(statement), {"tg_id": BENCH_TG_ID, "events_count": events_count})
+    # Каждый asyncio.run создаёт свой цикл событий, соединения прошлого цикла использовать нельзя.
+    await db_helper.dispose()
+
+
+async def _cleanup_queue():
+    redis = await create_pool(_redis_settings())
+    job_ids = await redis.zrange(BENCH_QUEUE, 0, -1)
+    for start in range(0, len(job_ids), 10_000):
+        await redis.delete(*(job_key_prefix + job_id.decode() for job_id in job_ids[start : start + 10_000]))
+    await redis.delete(BENCH_QUEUE)
+    await redis.aclose()
+
+
+async def _worker(window_end: datetime) -> int:
+    db_helper.configure(settings.database.scheduler_pool)
+    redis = await create_pool(_redis_settings())
+    try:
+        return await process_due_events(redis, window_end, settings.scheduler.scan_batch_size, BENCH_QUEUE)
+    finally:
+        await redis.aclose()
+        await db_helper.dispose()
+
+
+def run_worker(window_end: datetime) -> int:
+    return asyncio.run(_worker(window_end))
+
+
+def run(processes: int, events_count: int) -> None:
+    asyncio.run(_execute(SEED_STATEMENTS, events_count))
+    window_end = datetime_utc_now().replace(hour=23, minute=59, second=59, microsecond=999999)
+    try:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn")) as executor:
+            started = time.perf_counter()
+            processed = list(executor.map(run_worker, [window_end] * processes))
+            elapsed = time.perf_counter() - started
+    finally:
+        asyncio.run(_execute(CLEANUP_STATEMENTS))
+        asyncio.run(_cleanup_queue())
+
+    status = "OK" if sum(processed) == events_count else f"ОШИБКА: разобрано {sum(processed)}"
+    logger.info(
+        f"{processes} процесс(ов): {elapsed:.2f} с, {events_count / elapsed:.0f} событий/с, "
+        f"по процессам {processed}, {status}"
+    )
+
+
+if __name__ == "__main__":
+    events_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    processes = 1
+    while processes <= max_processes:
+        run(processes, events_count)
+        processes *= 2
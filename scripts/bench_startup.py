@@ -0,0 +1,162 @@
+"""Время запуска бота и воркера напоминаний.
+
+Для каждой точки входа несколько раз запускает отдельный процесс и выводит:
+- время импорта модуля (main и src.scheduler.main);
+- время от запуска процесса до первого обработанного обновления.
+
+Для бота первым обновлением считается ответ на /start, полученный через long polling
+от локального Bot API из bench_update_latency. Для воркера - отправка напоминания из
+задачи, поставленной до запуска в отдельную очередь arq:bench-startup; воркер
+запускается в режиме burst без cron-задач, поэтому настоящие напоминания не трогает.
+Бот и воркер обращаются к базе и Redis из настроек, сервер метрик отключается,
+состояние диалогов бота пишется под отдельным префиксом и удаляется после замера.
+
+Запуск: python bench_startup.py [количество запусков]
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from arq import create_pool
+from arq.constants import result_key_prefix
+from bench_update_latency import FIRST_CHAT_ID, FakeBotApi, _update
+from redis.asyncio import Redis
+
+from src.configs import settings
+from src.scheduler.main import WorkerSettings
+from src.scheduler.tasks import REMINDER_SENT_KEY_PREFIX
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING)
+
+logger = logging.getLogger(__file__)
+logger.setLevel(logging.INFO)
+
+# В контейнере скрипты лежат рядом с main.py, в репозитории - в каталоге scripts.
+ROOT = Path(__file__).resolve().parent
+if not (ROOT / "main.py").exists():
+    ROOT = ROOT.parent
+
+BENCH_QUEUE = "arq:bench-startup"
+BENCH_PERSISTENCE_PREFIX = "bench:startup:persistence"
+FIRST_UPDATE_TIMEOUT = 60
+
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+WORKER_SCRIPT = """
+import sys
+from arq.worker import Worker
+from src.scheduler.main import WorkerSettings
+Worker(
+    functions=WorkerSettings.functions,
+    on_startup=WorkerSettings.on_startup,
+    on_shutdown=WorkerSettings.on_shutdown,
+    redis_settings=WorkerSettings.redis_settings,
+    queue_name=sys.argv[1],
+    burst=True,
+    poll_delay=0.05,
+).run()
+"""
+
+
+def _env(api: FakeBotApi) -> dict[str, str]:
+    return os.environ | {
+        "BOT__API_BASE_URL": api.base_url,
+        "BOT__MODE": "polling",
+        "BOT__METRICS__ENABLED": "false",
+        "BOT__PERSISTENCE__KEY_PREFIX": BENCH_PERSISTENCE_PREFIX,
+        "SCHEDULER__METRICS__ENABLED": "false",
+    }
+
+
+async def measure_import(module: str) -> float:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", IMPORT_SCRIPT.format(module=module), cwd=ROOT, stdout=asyncio.subprocess.PIPE
+    )
+    stdout, _ = await process.communicate()
+    return float(stdout)
+
+
+async def measure_bot() -> float:
+    api = FakeBotApi(rtt=0)
+    await api.start()
+    chat_id = FIRST_CHAT_ID
+    reply = api.expect_reply(chat_id)
+    # Обновление уже ждёт у Telegram к моменту запуска бота.
+    api.push(_update(1, chat_id))
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "main.py", cwd=ROOT, env=_env(api), stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        return await asyncio.wait_for(reply, FIRST_UPDATE_TIMEOUT) - started
+    finally:
+        process.send_signal(signal.SIGINT)
+        await process.wait()
+        await api.stop()
+
+
+async def measure_worker(run: int) -> float:
+    api = FakeBotApi(rtt=0)
+    await api.start()
+    chat_id = FIRST_CHAT_ID + 1
+    reply = api.expect_reply(chat_id)
+    redis = await create_pool(WorkerSettings.redis_settings)
+    job_id = f"bench-startup:{time.time_ns()}:{run}"
+    await redis.enqueue_job("send_reminder", chat_id, -1, "bench", _job_id=job_id, _queue_name=BENCH_QUEUE)
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", WORKER_SCRIPT, BENCH_QUEUE, cwd=ROOT, env=_env(api), stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        return await asyncio.wait_for(reply, FIRST_UPDATE_TIMEOUT) - started
+    finally:
+        await process.wait()
+        await redis.delete(f"{REMINDER_SENT_KEY_PREFIX}{job_id}", result_key_prefix + job_id, BENCH_QUEUE)
+        await redis.aclose()
+        await api.stop()
+
+
+async def cleanup():
+    redis = Redis(host=settings.redis.host, port=settings.redis.port, db=settings.redis.database)
+    keys = [key async for key in redis.scan_iter(f"{BENCH_PERSISTENCE_PREFIX}:*")]
+    if keys:
+        await redis.delete(*keys)
+    await redis.aclose()
+
+
+def _report(name: str, values: list[float]):
+    logger.info(
+        f"{name:>32}: медиана {statistics.median(values) * 1000:7.0f} мс, "
+        f"мин {min(values) * 1000:7.0f} мс, макс {max(values) * 1000:7.0f} мс"
+    )
+
+
+async def main(runs: int):
+    results: dict[str, list[float]] = {
+        "бот, импорт main": [],
+        "бот, до первого обновления": [],
+        "воркер, импорт": [],
+        "воркер, до первого напоминания": [],
+    }
+    try:
+        for run in range(runs):
+            results["бот, импорт main"].append(await measure_import("main"))
+            results["бот, до первого обновления"].append(await measure_bot())
+            results["воркер, импорт"].append(await measure_import("src.scheduler.main"))
+            results["воркер, до первого напоминания"].append(await measure_worker(run))
+    finally:
+        await cleanup()
+
+    logger.info(f"{runs} запусков:")
+    for name, values in results.items():
+        _report(name, values)
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(main(runs))
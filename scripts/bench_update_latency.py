@@ -0,0 +1,248 @@
+"""Задержка от обновления до ответа бота в режимах polling и webhook.
+
+Поднимает локальный сервер, изображающий Bot API (getMe, getUpdates, sendMessage,
+setWebhook, deleteWebhook), и приложение бота с обработчиком /start. Синтетические
+обновления /start от разных чатов отдаются боту через long polling либо POST-запросом
+на webhook-сервер python-telegram-bot, как это делает Telegram. Для каждого режима выводит задержку от
+появления обновления до получения сервером sendMessage.
+
+rtt_ms добавляет задержку к каждому обращению между ботом и Bot API (ответы сервера и
+доставка webhook), чтобы приблизить замер к сети до Telegram.
+
+Запуск: python bench_update_latency.py [количество обновлений] [rtt_ms]
+"""
+
+import asyncio
+import logging
+import socket
+import statistics
+import sys
+import time
+from urllib.parse import parse_qsl
+
+import httpx
+import orjson
+from telegram.ext import Application, ApplicationBuilder, CommandHandler
+
+from src.handlers import start
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING)
+
+logger = logging.getLogger(__file__)
+logger.setLevel(logging.INFO)
+
+BENCH_TOKEN = "123456:bench"
+BENCH_SECRET = "bench-secret"
+BENCH_WEBHOOK_PATH = "telegram"
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+FIRST_CHAT_ID = 10_000
+
+
+class FakeBotApi:
+    """Минимальный Bot API: отдаёт обновления через getUpdates и запоминает время ответов бота."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.updates: list[dict] = []
+        self.has_updates = asyncio.Event()
+        self.replies: dict[int, asyncio.Future] = {}
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}/bot"
+
+    def push(self, update: dict):
+        self.updates.append(update)
+        self.has_updates.set()
+
+    def expect_reply(self, chat_id: int) -> asyncio.Future:
+        self.replies[chat_id] = asyncio.get_running_loop().create_future()
+        return self.replies[chat_id]
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset", 0))
+        self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates:
+            self.has_updates.clear()
+            try:
+                await asyncio.wait_for(self.has_updates.wait(), float(params.get("timeout", 0)))
+            except TimeoutError:
+                pass
+        return list(self.updates)
+
+    def _send_message(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        reply = self.replies.pop(chat_id, None)
+        if reply is not None and not reply.done():
+            reply.set_result(time.perf_counter())
+        return {
+            "message_id": 1,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params["text"],
+        }
+
+    async def _call(self, method: str, params: dict):
+        match method:
+            case "getMe":
+                return {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+            case "getUpdates":
+                return await self._get_updates(params)
+            case "sendMessage":
+                return self._send_message(params)
+            case "setWebhook" | "deleteWebhook":
+                return True
+        raise KeyError(method)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while request_line := await reader.readline():
+                _, path, *_ = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()).strip():
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                params = dict(parse_qsl(body.decode()))
+                try:
+                    payload = {"ok": True, "result": await self._call(path.rsplit("/", 1)[-1], params)}
+                except KeyError:
+                    payload = {"ok": False, "error_code": 404, "description": "Not Found"}
+                await asyncio.sleep(self.rtt)
+                content = orjson.dumps(payload)
+                writer.write(
+                    f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(content)}\r\n\r\n".encode()
+                    + content
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def _update(update_id: int, chat_id: int) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": "Bench"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user,
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _application(api: FakeBotApi) -> Application:
+    application = ApplicationBuilder().token(BENCH_TOKEN).base_url(api.base_url).build()
+    application.add_handler(CommandHandler("start", start))
+    return application
+
+
+async def measure_polling(api: FakeBotApi, count: int) -> list[float]:
+    application = _application(api)
+    await application.initialize()
+    await application.updater.start_polling(poll_interval=0, timeout=10)
+    await application.start()
+    latencies = []
+    try:
+        for index in range(1, count + 1):
+            chat_id = FIRST_CHAT_ID + index
+            reply = api.expect_reply(chat_id)
+            started = time.perf_counter()
+            # Обновление появляется у Telegram и уходит боту в ответе на getUpdates.
+            api.push(_update(index, chat_id))
+            latencies.append(await reply - started)
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+    return latencies
+
+
+async def measure_webhook(api: FakeBotApi, count: int) -> list[float]:
+    application = _application(api)
+    port = _free_port()
+    await application.initialize()
+    await application.updater.start_webhook(
+        listen="127.0.0.1",
+        port=port,
+        url_path=BENCH_WEBHOOK_PATH,
+        webhook_url=f"http://127.0.0.1:{port}/{BENCH_WEBHOOK_PATH}",
+        secret_token=BENCH_SECRET,
+    )
+    await application.start()
+    latencies = []
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            for index in range(1, count + 1):
+                chat_id = FIRST_CHAT_ID + index
+                reply = api.expect_reply(chat_id)
+                started = time.perf_counter()
+                # Telegram доставляет обновление сам, задержка сети - на пути к боту.
+                await asyncio.sleep(api.rtt)
+                response = await client.post(
+                    f"/{BENCH_WEBHOOK_PATH}",
+                    content=orjson.dumps(_update(index, chat_id)),
+                    headers={SECRET_TOKEN_HEADER: BENCH_SECRET, "Content-Type": "application/json"},
+                )
+                response.raise_for_status()
+                latencies.append(await reply - started)
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+    return latencies
+
+
+def _summary(latencies: list[float]) -> dict[str, float]:
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "среднее": statistics.fmean(latencies),
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+        "макс": max(latencies),
+    }
+
+
+async def main(count: int, rtt_ms: float):
+    api = FakeBotApi(rtt_ms / 1000)
+    await api.start()
+    try:
+        results = {
+            "polling": _summary(await measure_polling(api, count)),
+            "webhook": _summary(await measure_webhook(api, count)),
+        }
+    finally:
+        await api.stop()
+
+    logger.info(f"{count} обновлений, rtt {rtt_ms:g} мс, задержка до ответа в мс:")
+    logger.info(f"{'':>10}{'polling':>12}{'webhook':>12}")
+    for name in results["polling"]:
+        polling, webhook = results["polling"][name] * 1000, results["webhook"][name] * 1000
+        logger.info(f"{name:>10}{polling:>12.2f}{webhook:>12.2f}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rtt_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    asyncio.run(main(count, rtt_ms))
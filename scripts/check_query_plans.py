@@ -0,0 +1,165 @@
+"""Проверка планов запросов репозиториев.
+
+Наполняет базу синтетическими данными внутри транзакции, выполняет запросы
+репозиториев, снимает для каждого EXPLAIN и завершается с ошибкой, если хоть
+один план содержит Seq Scan. Транзакция откатывается, данные в базе не меняются.
+
+Запуск: python check_query_plans.py
+"""
+
+import asyncio
+import logging
+import sys
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.core.unitofwork import UnitOfWork
+from src.database import User, db_helper
+from src.utils import datetime_utc_now
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+USERS_COUNT = 200
+EXPENSES_PER_USER = 250
+EVENTS_PER_USER = 50
+CHECK_USER_TG_ID = -1
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO "user" (telegram_id, chat_id, name, is_active)
+    SELECT -g, -g, 'plan-check', true FROM generate_series(1, :users_count) AS g
+    """,
+    """
+    INSERT INTO category (codename, name, aliases, is_base_expense)
+    SELECT 'plan_check_' || g, 'plan-check-' || g, jsonb_build_array('plan-check-' || g), false
+    FROM generate_series(1, 20) AS g
+    """,
+    """
+    INSERT INTO category (codename, name, aliases, is_base_expense)
+    SELECT 'plan_check_other', 'plan-check-other', '["прочее"]'::jsonb, false
+    WHERE NOT EXISTS (SELECT 1 FROM category WHERE aliases ? 'прочее')
+    """,
+    """
+    INSERT INTO expense (amount, user_id, category_id, created_at)
+    SELECT round((random() * 1000)::numeric, 2), u.id, c.ids[1 + g % array_length(c.ids, 1)],
+           now() - random() * interval '365 days'
+    FROM "user" AS u
+    CROSS JOIN generate_series(1, :expenses_per_user) AS g
+    CROSS JOIN (SELECT array_agg(id) AS ids FROM category) AS c
+    WHERE u.name = 'plan-check'
+    """,
+    """
+    INSERT INTO event (event_datetime, description, message_count, user_id)
+    SELECT now() + random() * interval '60 days' - interval '30 days', 'plan-check', 1, u.id
+    FROM "user" AS u
+    CROSS JOIN generate_series(1, :events_per_user) AS g
+    WHERE u.name = 'plan-check'
+    """,
+    "ANALYZE",
+)
+
+RepositoryCall = Callable[[UnitOfWork], Awaitable[Any]]
+
+
+def _repository_calls() -> dict[str, RepositoryCall]:
+    now = datetime_utc_now()
+    return {
+        "CategoryRepository.get_category_by_alias": lambda uow: uow.category.get_category_by_alias("plan-check-1"),
+        "CategoryRepository.get_category_by_alias (прочее)": lambda uow: uow.category.get_category_by_alias(
+            "plan-check-missing"
+        ),
+        "UserRepository.get_user_by_tg_id": lambda uow: uow.user.get_user_by_tg_id(CHECK_USER_TG_ID),
+        "ExpenseRepository.get_statistics_by_months_count": lambda uow: uow.expense.get_statistics_by_months_count(
+            CHECK_USER_TG_ID, 3
+        ),
+        "ExpenseRepository.get_expenses_page": lambda uow: uow.expense.get_expenses_page(CHECK_USER_TG_ID),
+        "ExpenseRepository.get_expenses_page (older)": lambda uow: uow.expense.get_expenses_page(
+            CHECK_USER_TG_ID, before_id=2**31 - 1
+        ),
+        "ExpenseRepository.get_expenses_page (newer)": lambda uow: uow.expense.get_expenses_page(
+            CHECK_USER_TG_ID, after_id=0
+        ),
+        "ExpenseRepository.add_by_category_alias": lambda uow: uow.expense.add_by_category_alias(
+            10, None, "plan-check-1", User(telegram_id=CHECK_USER_TG_ID, chat_id=CHECK_USER_TG_ID, name="plan-check")
+        ),
+        "EventRepository.claim_due_events": lambda uow: uow.event.claim_due_events(now + timedelta(minutes=10), 1000, now),
+        "EventRepository.delete_by_ids": lambda uow: uow.event.delete_by_ids([1, 2, 3]),
+        "EventRepository.reschedule": lambda uow: uow.event.reschedule({1: now, 2: now}),
+        "EventRepository.get_page_by_user_tg": lambda uow: uow.event.get_page_by_user_tg(CHECK_USER_TG_ID),
+        "EventRepository.get_page_by_user_tg (later)": lambda uow: uow.event.get_page_by_user_tg(
+            CHECK_USER_TG_ID, after=(now, 0)
+        ),
+        "EventRepository.get_page_by_user_tg (earlier)": lambda uow: uow.event.get_page_by_user_tg(
+            CHECK_USER_TG_ID, before=(now, 2**31 - 1)
+        ),
+    }
+
+
+def _find_seq_scans(plan: dict[str, Any]) -> list[str]:
+    """Возвращает таблицы, которые план читает последовательным сканированием."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", ()):
+        found.extend(_find_seq_scans(child))
+    return found
+
+
+async def _capture_statements(connection: AsyncConnection, call: RepositoryCall) -> list[tuple[str, Any]]:
+    """Выполняет вызов репозитория и возвращает отправленные в базу запросы."""
+    statements: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(connection.sync_connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+        await call(UnitOfWork(session))
+        await session.close()
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", before_cursor_execute)
+    return [(stmt, params) for stmt, params in statements if not stmt.startswith(("SAVEPOINT", "RELEASE"))]
+
+
+async def check_query_plans() -> bool:
+    failed = False
+    async with db_helper.engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            for statement in SEED_STATEMENTS:
+                await connection.execute(
+                    text(statement),
+                    {
+                        "users_count": USERS_COUNT,
+                        "expenses_per_user": EXPENSES_PER_USER,
+                        "events_per_user": EVENTS_PER_USER,
+                    },
+                )
+            # На маленьких таблицах планировщик честно выбирает Seq Scan, поэтому запрещаем его:
+            # если Seq Scan всё равно остался в плане, подходящего индекса нет.
+            await connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+            for name, call in _repository_calls().items():
+                for statement, parameters in await _capture_statements(connection, call):
+                    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar_one()[0]["Plan"]
+                    seq_scans = _find_seq_scans(plan)
+                    if seq_scans:
+                        failed = True
+                        logger.error(f"{name}: Seq Scan по {', '.join(seq_scans)}\n{statement}")
+                    else:
+                        logger.info(f"{name}: OK ({plan['Node Type']})")
+        finally:
+            await transaction.rollback()
+    await db_helper.dispose()
+    return not failed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_query_plans()) else 1)
@@ -0,0 +1,200 @@
+"""Проверка, что сбой планировщика не приводит к повторной отправке напоминаний.
+
+Создаёт у отдельного пользователя заданное количество наступивших событий (половина
+повторяющихся) и запускает process_due_events с падением между постановкой задач и
+commit: задачи уже в очереди, а события в базе откатились. Затем проход повторяется
+целиком, и в очереди должна оказаться ровно одна задача на каждое повторение события.
+После этого воркер arq в режиме burst выполняет очередь с ботом, который только
+записывает отправки. Отдельно моделируются падение воркера посреди отправки (такое
+напоминание должно быть отправлено повтором задачи) и повторный запуск уже выполненной
+задачи (потерян результат). Завершается с ошибкой, если хоть одно напоминание
+поставлено или отправлено дважды или не отправлено.
+
+process_due_events разбирает все наступившие события, поэтому запускать скрипт нужно
+на базе, где нет наступивших событий других пользователей. События, пользователь и
+задачи удаляются после проверки.
+
+Запуск: python check_reminder_dedup.py [количество событий]
+"""
+
+import asyncio
+import logging
+import sys
+from collections import Counter
+from datetime import datetime
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.constants import job_key_prefix, result_key_prefix
+from arq.jobs import Job
+from arq.worker import Worker, func
+from sqlalchemy import text
+
+from src.configs import RateLimitSettings, settings
+from src.database import db_helper
+from src.scheduler import tasks
+from src.scheduler.enqueue import JobSpec, enqueue_jobs
+from src.scheduler.rate_limit import TelegramRateLimiter
+from src.scheduler.tasks import (
+    REMINDER_SENDING_KEY_PREFIX,
+    REMINDER_SENT_KEY_PREFIX,
+    get_redundant_sends,
+    process_due_events,
+    send_reminder,
+)
+from src.utils import datetime_utc_now
+
+logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+logger = logging.getLogger(__file__)
+
+DEDUP_TG_ID = -100503
+DEDUP_QUEUE = "arq:dedup-check"
+# Сколько ещё держится аренда отправки, оставленная упавшим воркером.
+CRASHED_LEASE_MS = 500
+# Лимиты не проверяются этим скриптом, поэтому заведомо не мешают.
+DEDUP_RATE_LIMIT = RateLimitSettings(
+    global_rate=100_000, global_burst=100_000, chat_rate=1000, chat_burst=1000, key_prefix="ratelimit:dedup-check"
+)
+
+# Одно сообщение на событие: следующие сообщения назначены на будущее, и воркер в режиме burst их бы ждал.
+SEED_STATEMENTS = (
+    """
+    INSERT INTO "user" (telegram_id, chat_id, name, is_active)
+    VALUES (:tg_id, :tg_id, 'dedup-check', true)
+    """,
+    """
+    INSERT INTO event (event_datetime, description, message_count, repeat_interval, user_id)
+    SELECT now() - interval '1 second', 'dedup-check ' || g, 1,
+           CASE WHEN g % 2 = 0 THEN 'DAILY'::event_repeat_intervals END, u.id
+    FROM "user" AS u
+    CROSS JOIN generate_series(1, :events_count) AS g
+    WHERE u.telegram_id = :tg_id
+    """,
+)
+
+CLEANUP_STATEMENTS = (
+    'DELETE FROM event WHERE user_id IN (SELECT id FROM "user" WHERE telegram_id = :tg_id)',
+    'DELETE FROM "user" WHERE telegram_id = :tg_id',
+)
+
+
+class SimulatedCrash(Exception):
+    """Падение прохода после постановки задач, до commit."""
+
+
+class RecordingBot:
+    """Бот, который вместо отправки запоминает сообщения."""
+
+    def __init__(self):
+        self.sent: Counter[tuple[int, str]] = Counter()
+
+    async def send_message(self, chat_id: int, text: str):
+        self.sent[(chat_id, text)] += 1
+
+
+async def _execute(statements: tuple[str, ...], events_count: int = 0):
+    async with db_helper.engine.begin() as connection:
+        for statement in statements:
+            await connection.execute(text(statement), {"tg_id": DEDUP_TG_ID, "events_count": events_count})
+
+
+async def crash_before_commit(redis: ArqRedis, window_end: datetime):
+    """Проход process_due_events, который падает сразу после постановки первой пачки задач."""
+    async def enqueue_then_crash(*args, **kwargs):
+        await enqueue_jobs(*args, **kwargs)
+        raise SimulatedCrash
+
+    tasks.enqueue_jobs = enqueue_then_crash
+    try:
+        await process_due_events(redis, window_end, settings.scheduler.scan_batch_size, DEDUP_QUEUE)
+    except SimulatedCrash:
+        pass
+    else:
+        raise RuntimeError("Проход не дошёл до постановки задач.")
+    finally:
+        tasks.enqueue_jobs = enqueue_jobs
+
+
+async def queued_jobs(redis: ArqRedis) -> list[JobSpec]:
+    """Задачи проверки в очереди в том виде, в каком их ставит планировщик."""
+    jobs = []
+    for job_id in await redis.zrange(DEDUP_QUEUE, 0, -1):
+        info = await Job(job_id.decode(), redis, _queue_name=DEDUP_QUEUE).info()
+        if info is not None and info.args[0] == DEDUP_TG_ID:
+            jobs.append(JobSpec(info.function, info.args, info.args[3], info.job_id))
+    return jobs
+
+
+async def run_worker(redis: ArqRedis, bot: RecordingBot):
+    worker = Worker(
+        functions=[func(send_reminder, name="send_reminder")],
+        queue_name=DEDUP_QUEUE,
+        redis_pool=redis,
+        burst=True,
+        handle_signals=False,
+        poll_delay=0.1,
+        max_jobs=100,
+        ctx={"bot": bot, "rate_limiter": TelegramRateLimiter(redis, DEDUP_RATE_LIMIT)},
+    )
+    await worker.async_run()
+    await worker.close()
+
+
+async def cleanup(redis: ArqRedis, jobs: list[JobSpec]):
+    for job in jobs:
+        await redis.delete(
+            job_key_prefix + job.job_id,
+            result_key_prefix + job.job_id,
+            REMINDER_SENT_KEY_PREFIX + job.job_id,
+            REMINDER_SENDING_KEY_PREFIX + job.job_id,
+        )
+    await redis.delete(DEDUP_QUEUE)
+    await _execute(CLEANUP_STATEMENTS)
+
+
+async def main(events_count: int) -> bool:
+    redis = await create_pool(RedisSettings(host=settings.redis.host, port=settings.redis.port))
+    bot = RecordingBot()
+    jobs: list[JobSpec] = []
+    redundant_before = await get_redundant_sends(redis)
+    try:
+        await _execute(SEED_STATEMENTS, events_count)
+        window_end = datetime_utc_now()
+        await crash_before_commit(redis, window_end)
+        crashed = len(await queued_jobs(redis))
+        # События откатились, повторный проход ставит те же задачи и фиксирует разбор.
+        processed = await process_due_events(redis, window_end, settings.scheduler.scan_batch_size, DEDUP_QUEUE)
+        jobs = await queued_jobs(redis)
+        per_occurrence = Counter((job.args[1], job.args[3]) for job in jobs)
+        logger.info(
+            f"Проход с падением поставил {crashed} задач, повторный разобрал {processed} событий, "
+            f"в очереди {len(jobs)} задач на {len(per_occurrence)} повторений."
+        )
+        if processed != events_count or len(jobs) != events_count or max(per_occurrence.values()) != 1:
+            return False
+
+        # Воркер упал посреди отправки: осталась аренда без отметки об отправке.
+        await redis.set(REMINDER_SENDING_KEY_PREFIX + jobs[-1].job_id, 1, px=CRASHED_LEASE_MS)
+        await run_worker(redis, bot)
+
+        # Потерян результат выполненной задачи: повторная постановка проходит, отправку останавливает отметка.
+        await redis.delete(result_key_prefix + jobs[0].job_id)
+        await enqueue_jobs(redis, jobs[:1], queue_name=DEDUP_QUEUE)
+        await run_worker(redis, bot)
+    finally:
+        await cleanup(redis, [*jobs, *await queued_jobs(redis)])
+        redundant = await get_redundant_sends(redis) - redundant_before
+        await redis.aclose()
+        await db_helper.dispose()
+
+    duplicates = sum(count - 1 for count in bot.sent.values() if count > 1)
+    logger.info(
+        f"Отправлено {sum(bot.sent.values())} из {events_count} напоминаний, дублей: {duplicates}, "
+        f"повторных запусков send_reminder: {redundant}."
+    )
+    return duplicates == 0 and len(bot.sent) == events_count
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)) else 1)
@@ -1,10 +1,84 @@
-from pydantic import BaseModel
+from typing import Literal, cast
+
+from pydantic import BaseModel, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class MetricsSettings(BaseModel):
+    enabled: bool = True
+    host: str = "0.0.0.0"
+    port: int = 9100
+
+
+class WebhookSettings(BaseModel):
+    listen: str = "0.0.0.0"
+    port: int = 8443
+    url_path: str = "telegram"
+    # Внешний адрес, по которому Telegram доступен бот, без url_path.
+    url: str = ""
+    secret_token: str | None = None
+    # Если сертификат и ключ заданы, сервер принимает HTTPS сам и передаёт сертификат в setWebhook,
+    # иначе TLS завершается на прокси.
+    cert_path: str | None = None
+    key_path: str | None = None
+    max_connections: int = 40
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.url.rstrip('/')}/{self.url_path.strip('/')}"
+
+
+class PersistenceSettings(BaseModel):
+    # Хранить состояние диалогов и user_data в Redis, чтобы они переживали перезапуск.
+    enabled: bool = True
+    key_prefix: str = "bot:persistence"
+    # Как часто накопленные изменения записываются в Redis, в секундах.
+    flush_interval: float = 1.0
+
+
 class BotSettings(BaseModel):
     token: str
     reminder_token: str
+    # Адрес Bot API, например локального telegram-bot-api сервера.
+    api_base_url: str = "https://api.telegram.org/bot"
+    mode: Literal["polling", "webhook"] = "polling"
+    webhook: WebhookSettings = WebhookSettings()
+    # Сколько обновлений обрабатывается одновременно. По умолчанию - размер пула соединений бота.
+    max_concurrent_updates: int | None = None
+    max_pending_updates: int = 10_000
+    persistence: PersistenceSettings = PersistenceSettings()
+    metrics: MetricsSettings = MetricsSettings()
+    # Обновления дольше порога логируются вместе с SQL-запросами.
+    slow_update_threshold_ms: int = 1000
+
+    @model_validator(mode="after")
+    def check_webhook(self) -> "BotSettings":
+        # Без секретного токена webhook принимал бы обновления от кого угодно.
+        if self.mode == "webhook" and not (self.webhook.secret_token and self.webhook.url):
+            raise ValueError("В режиме webhook обязательны webhook.secret_token и webhook.url")
+        return self
+
+
+# Нужна моделям при импорте, поэтому не требует чтения окружения.
+NAMING_CONVENTION = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "uq_%(table_name)s_%(column_0_N_name)s",
+    "ck": "ck_%(table_name)s_%(constraint_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+    "pk": "pk_%(table_name)s",
+}
+
+
+class PoolSettings(BaseModel):
+    pool_size: int = 50
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    prepared_statement_cache_size: int = 100
+    statement_timeout_ms: int = 30_000
+    # Сколько соединений открыть при запуске, чтобы первые запросы не ждали подключения.
+    warm_up_connections: int = 5
 
 
 class DatabaseSettings(BaseModel):
@@ -15,16 +89,10 @@ class DatabaseSettings(BaseModel):
     postgres_db: str
     echo: bool = False
     echo_pool: bool = False
-    pool_size: int = 50
-    max_overflow: int = 10
+    bot_pool: PoolSettings = PoolSettings()
+    scheduler_pool: PoolSettings = PoolSettings(pool_size=10, max_overflow=5, statement_timeout_ms=60_000)
 
-    naming_convention: dict[str, str] = {
-        "ix": "ix_%(column_0_label)s",
-        "uq": "uq_%(table_name)s_%(column_0_N_name)s",
-        "ck": "ck_%(table_name)s_%(constraint_name)s",
-        "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
-        "pk": "pk_%(table_name)s",
-    }
+    naming_convention: dict[str, str] = NAMING_CONVENTION
 
     @property
     def url(self) -> str:
@@ -33,9 +101,50 @@ class DatabaseSettings(BaseModel):
         )
 
 
+class RedisSettings(BaseModel):
+    host: str = "redis"
+    port: int = 6379
+    database: int = 0
+
+
+class CacheSettings(BaseModel):
+    # "memory" годится только для одного процесса бота: версии статистики не общие между
+    # процессами, и реплика отдала бы статистику, уже сброшенную другой. Для нескольких реплик - "redis".
+    backend: Literal["memory", "redis"] = "memory"
+    statistics_ttl: int = 3600
+
+
+class RateLimitSettings(BaseModel):
+    # Telegram допускает около 30 сообщений в секунду от бота и около одного в секунду в чат.
+    global_rate: float = 25
+    global_burst: int = 30
+    chat_rate: float = 1
+    chat_burst: int = 3
+    # Ожидание до этого порога выполняется внутри задачи, дольше - задача откладывается.
+    max_inline_wait: float = 1.0
+    key_prefix: str = "ratelimit:telegram"
+
+
+class SchedulerSettings(BaseModel):
+    lookahead_minutes: int = 10
+    # Сколько событий забирает воркер за одну транзакцию.
+    scan_batch_size: int = 1000
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    # Что делать с напоминаниями, опоздавшими больше чем на catch_up_grace_minutes (например, после
+    # простоя воркера): send_latest - отправить только последнее из пропущенных, skip - не отправлять.
+    catch_up_policy: Literal["send_latest", "skip"] = "send_latest"
+    catch_up_grace_minutes: int = 5
+    metrics: MetricsSettings = MetricsSettings()
+    # Отложенные из-за лимитов попытки тоже считаются, поэтому запас больше стандартных 5.
+    send_max_tries: int = 50
+
+
 class Settings(BaseSettings):
     bot: BotSettings
     database: DatabaseSettings
+    redis: RedisSettings = RedisSettings()
+    cache: CacheSettings = CacheSettings()
+    scheduler: SchedulerSettings = SchedulerSettings()
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -45,4 +154,19 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()
+class LazySettings:
+    """Настройки, которые читаются из окружения при первом обращении, а не при импорте."""
+
+    def __init__(self):
+        self._settings: Settings | None = None
+
+    def load(self) -> Settings:
+        if self._settings is None:
+            self._settings = Settings()
+        return self._settings
+
+    def __getattr__(self, name: str):
+        return getattr(self.load(), name)
+
+
+settings = cast(Settings, LazySettings())
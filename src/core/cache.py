@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Protocol, TypeVar
+
+from redis.asyncio import Redis
+
+from src.configs import CacheSettings, RedisSettings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Ограниченный по размеру LRU-кэш со счётчиками попаданий и промахов."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class CacheBackend(Protocol):
+    """Хранилище кэша: байтовые значения с TTL и целочисленные счётчики без срока жизни."""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: int): ...
+
+    async def get_counter(self, key: str) -> int: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def close(self): ...
+
+
+class MemoryCacheBackend:
+    """Кэш в памяти процесса, только для одного процесса бота: счётчики не видны другим репликам."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self._values: LRUCache[str, tuple[float, bytes]] = LRUCache(maxsize)
+        self._counters: LRUCache[str, int] = LRUCache(maxsize)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._values.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._values.set(key, (time.monotonic() + ttl, value))
+
+    async def get_counter(self, key: str) -> int:
+        value = self._counters.get(key)
+        if value is None:
+            # Вытесненный счётчик начинается с нового большого числа, а не с нуля,
+            # чтобы не совпасть с версией ещё не вытесненных записей.
+            value = time.monotonic_ns()
+            self._counters.set(key, value)
+        return value
+
+    async def incr(self, key: str) -> int:
+        value = await self.get_counter(key) + 1
+        self._counters.set(key, value)
+        return value
+
+    async def close(self):
+        self._values.clear()
+
+
+class RedisCacheBackend:
+    """Кэш в Redis, общий для всех реплик бота."""
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.redis.set(key, value, ex=ttl)
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self.redis.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self.redis.incr(key)
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+def create_cache_backend(cache_settings: CacheSettings, redis_settings: RedisSettings) -> CacheBackend:
+    if cache_settings.backend == "redis":
+        return RedisCacheBackend(
+            Redis(host=redis_settings.host, port=redis_settings.port, db=redis_settings.database)
+        )
+    return MemoryCacheBackend()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import pickle
+from typing import Any
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+ConversationKey = tuple[int | str, ...]
+
+
+class RedisPersistence(BasePersistence[dict, dict, dict]):
+    """Хранит состояние диалогов ConversationHandler и user_data в Redis.
+
+    Приложение передаёт изменения раз в flush_interval секунд. Изменения одного ключа
+    за это время схлопываются в последнее значение, а всё накопленное записывается в Redis
+    одним pipeline. Значения сериализуются pickle, как в PicklePersistence, чтобы
+    сохранялись Enum-состояния диалогов и типы значений user_data.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_prefix: str,
+        flush_interval: float,
+        store_data: PersistenceInput | None = None,
+    ):
+        super().__init__(
+            store_data=store_data or PersistenceInput(bot_data=False, chat_data=False, callback_data=False),
+            update_interval=flush_interval,
+        )
+        self.redis = redis
+        self.key_prefix = key_prefix
+        # (ключ hash, поле) -> новое значение, None - удалить поле.
+        self._pending: dict[tuple[str, str], bytes | None] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+        self.flushes = 0
+        self.flushed_writes = 0
+
+    def _key(self, kind: str) -> str:
+        return f"{self.key_prefix}:{kind}"
+
+    async def _load(self, kind: str) -> dict[str, Any]:
+        stored = await self.redis.hgetall(self._key(kind))
+        return {field.decode(): pickle.loads(value) for field, value in stored.items()}
+
+    def _stage(self, kind: str, field: str, value: Any):
+        self._pending[(self._key(kind), field)] = None if value is None else pickle.dumps(value)
+        if self._flush_task is None:
+            # Приложение вызывает update_* для всех изменившихся ключей через gather, задача
+            # записи встаёт в очередь цикла событий после них и забирает всё сразу.
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        self._flush_task = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        # Пачки пишутся по очереди, чтобы более старая не перезаписала более новую.
+        async with self._write_lock:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for (key, field), value in pending.items():
+                        if value is None:
+                            pipe.hdel(key, field)
+                        else:
+                            pipe.hset(key, field, value)
+                    await pipe.execute()
+            except RedisError:
+                logger.exception("Не удалось сохранить состояние диалогов, запись повторится при следующем сохранении.")
+                self._pending = pending | self._pending
+                return
+        self.flushes += 1
+        self.flushed_writes += len(pending)
+
+    async def get_user_data(self) -> dict[int, dict]:
+        return {int(user_id): data for user_id, data in (await self._load("user_data")).items()}
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        return {int(chat_id): data for chat_id, data in (await self._load("chat_data")).items()}
+
+    async def get_bot_data(self) -> dict:
+        return (await self._load("bot_data")).get("data", {})
+
+    async def get_callback_data(self) -> Any:
+        return (await self._load("callback_data")).get("data")
+
+    async def get_conversations(self, name: str) -> dict[ConversationKey, object]:
+        return {
+            tuple(orjson.loads(key)): state for key, state in (await self._load(f"conversations:{name}")).items()
+        }
+
+    async def update_conversation(self, name: str, key: ConversationKey, new_state: object | None) -> None:
+        self._stage(f"conversations:{name}", orjson.dumps(key).decode(), new_state)
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._stage("user_data", str(user_id), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._stage("chat_data", str(chat_id), data)
+
+    async def update_bot_data(self, data: dict) -> None:
+        self._stage("bot_data", "data", data)
+
+    async def update_callback_data(self, data: Any) -> None:
+        self._stage("callback_data", "data", data)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stage("user_data", str(user_id), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._stage("chat_data", str(chat_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """Записывает всё накопленное при остановке приложения и закрывает соединение."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._flush_pending()
+        logger.info(f"Сохранение состояния: {self.flushes} записей в Redis, {self.flushed_writes} ключей")
+        await self.redis.aclose()
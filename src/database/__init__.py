@@ -1,10 +1,11 @@
 from src.database.db_helper import db_helper
-from src.database.models import Assets, BaseDbModel, Category, Expense, User
+from src.database.models import Assets, BaseDbModel, Category, Expense, ExpenseMonthlyRollup, User
 
 __all__ = [
     "BaseDbModel",
     "User",
     "Expense",
+    "ExpenseMonthlyRollup",
     "Category",
     "Assets",
     "db_helper",
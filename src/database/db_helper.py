@@ -1,37 +1,177 @@
-from typing import AsyncGenerator
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Iterator
 
+from prometheus_client.metrics_core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
 
-from src.configs import settings
+from src.configs import PoolSettings, settings
+
+
+class PoolMetrics:
+    """Счётчики пула соединений для подбора его размера под нагрузкой."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def observe_checkout(self, wait_time: float):
+        self.checkouts += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который считает время ожидания соединения, выходы за pool_size и таймауты."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - started)
+        return connection
+
+    def _inc_overflow(self) -> bool:
+        created = super()._inc_overflow()
+        if created and self._overflow > 0:
+            self.metrics.overflow_events += 1
+        return created
+
+
+# Текущее состояние пула отдаётся как gauge, накопленные счётчики - как counter.
+POOL_GAUGES = {
+    "size": "Размер пула соединений.",
+    "checked_out": "Соединения, выданные из пула.",
+    "checked_in": "Свободные соединения в пуле.",
+    "overflow": "Соединения сверх pool_size.",
+    "wait_time_max": "Наибольшее ожидание соединения, с.",
+}
+POOL_COUNTERS = {
+    "checkouts": "Выдачи соединений из пула.",
+    "wait_time_total": "Суммарное ожидание соединения, с.",
+    "overflow_events": "Открытия соединений сверх pool_size.",
+    "timeouts": "Таймауты ожидания соединения.",
+}
+
+
+class PoolStatsCollector(Collector):
+    """Отдаёт pool_stats() как метрики db_pool_*; пока движок не создан, метрик нет."""
+
+    def __init__(self, helper: "DatabaseHelper"):
+        self.helper = helper
+
+    def collect(self) -> Iterator[GaugeMetricFamily | CounterMetricFamily]:
+        if self.helper._engine is None:
+            return
+        stats = self.helper.pool_stats()
+        for name, documentation in POOL_GAUGES.items():
+            yield GaugeMetricFamily(f"db_pool_{name}", documentation, value=stats[name])
+        for name, documentation in POOL_COUNTERS.items():
+            yield CounterMetricFamily(f"db_pool_{name}", documentation, value=stats[name])
 
 
 class DatabaseHelper:
-    def __init__(self, url: str, echo: bool = False):
-        self.engine: AsyncEngine = create_async_engine(
-            url=url,
-            echo=echo,
+    """Движок и фабрика сессий, которые создаются при первом обращении или вызове configure.
+
+    Импорт модуля не читает настройки и не создаёт движок.
+    """
+
+    def __init__(self):
+        self.pool_settings: PoolSettings | None = None
+        self._engine: AsyncEngine | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self.configure()
+        return self._engine
+
+    @property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        if self._session_factory is None:
+            self.configure()
+        return self._session_factory
+
+    def configure(self, pool: PoolSettings | None = None):
+        """Создаёт движок с настройками пула, по умолчанию пула бота. Вызывается до первого обращения к базе."""
+        database = settings.database
+        self.pool_settings = pool = pool or database.bot_pool
+        self._engine = create_async_engine(
+            url=database.url,
+            echo=database.echo,
+            echo_pool=database.echo_pool,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=pool.pool_size,
+            max_overflow=pool.max_overflow,
+            pool_timeout=pool.pool_timeout,
+            pool_recycle=pool.pool_recycle,
+            pool_pre_ping=pool.pool_pre_ping,
+            connect_args={
+                "prepared_statement_cache_size": pool.prepared_statement_cache_size,
+                "server_settings": {"statement_timeout": str(pool.statement_timeout_ms)},
+            },
         )
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
+        self._session_factory = async_sessionmaker(
+            bind=self._engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
 
+    def pool_stats(self) -> dict[str, int | float]:
+        """Текущее состояние пула и накопленные счётчики."""
+        pool: InstrumentedAsyncQueuePool = self.engine.pool
+        metrics = pool.metrics
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": metrics.checkouts,
+            "wait_time_total": metrics.wait_time_total,
+            "wait_time_max": metrics.wait_time_max,
+            "wait_time_avg": metrics.wait_time_total / metrics.checkouts if metrics.checkouts else 0.0,
+            "overflow_events": metrics.overflow_events,
+            "timeouts": metrics.timeouts,
+        }
+
+    async def warm_up(self) -> None:
+        """Заранее открывает warm_up_connections соединений пула."""
+        engine = self.engine
+
+        async def connect():
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+        count = min(self.pool_settings.warm_up_connections, self.pool_settings.pool_size)
+        await asyncio.gather(*(connect() for _ in range(count)))
+
     async def dispose(self) -> None:
-        await self.engine.dispose()
+        if self._engine is not None:
+            await self._engine.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
 
-db_helper = DatabaseHelper(
-    url=str(settings.database.url),
-    echo=settings.database.echo,
-)
+db_helper = DatabaseHelper()
@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
-from sqlalchemy import DateTime, ForeignKey, MetaData, Numeric, String, Text
+from sqlalchemy import Date, DateTime, ForeignKey, Index, MetaData, Numeric, String, Text, UniqueConstraint
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -12,15 +12,15 @@ from sqlalchemy.orm import (
 )
 from sqlalchemy.sql import func
 
-from src.configs import settings
+from src.configs import NAMING_CONVENTION
 from src.reminders.schemes import EventRepeatInterval
-from src.utils import camel_case_to_snake_case, datetime_utc_now
+from src.utils import DEFAULT_TIMEZONE, camel_case_to_snake_case, datetime_utc_now
 
 
 class BaseDbModel(DeclarativeBase):
     __abstract__ = True
     metadata = MetaData(
-        naming_convention=settings.database.naming_convention,
+        naming_convention=NAMING_CONVENTION,
     )
 
     type_annotation_map = {dict[str, Any]: postgresql.JSONB, list[str]: postgresql.JSONB}
@@ -49,12 +49,18 @@ class User(BaseDbModel):
     name: Mapped[str] = mapped_column(String(32))
     lastname: Mapped[str | None] = mapped_column(String(32))
     is_active: Mapped[bool] = mapped_column(default=True)
+    timezone: Mapped[str] = mapped_column(String(64), default=DEFAULT_TIMEZONE, server_default=DEFAULT_TIMEZONE)
     expenses: Mapped[list["Expense"]] = relationship(back_populates="user")
     assets: Mapped[list["Assets"]] = relationship(back_populates="user")
     events: Mapped[list["Event"]] = relationship(back_populates="user")
 
 
 class Expense(BaseDbModel):
+    __table_args__ = (
+        Index("ix_expense_user_id_created_at", "user_id", "created_at"),
+        Index("ix_expense_user_id_id", "user_id", "id"),
+    )
+
     amount: Mapped[float] = mapped_column(Numeric(10, 2))
     description: Mapped[str | None] = mapped_column(Text)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
@@ -63,7 +69,24 @@ class Expense(BaseDbModel):
     category: Mapped["Category"] = relationship(back_populates="expenses")
 
 
+class ExpenseMonthlyRollup(BaseDbModel):
+    """Суммы расходов пользователя по категориям за месяц.
+
+    Поддерживается триггерами на таблице expense, пересобирается скриптом backfill_expense_rollup.py.
+    """
+
+    __table_args__ = (UniqueConstraint("user_id", "category_id", "month"),)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
+    category_id: Mapped[int] = mapped_column(ForeignKey("category.id"))
+    month: Mapped[date] = mapped_column(Date)
+    amount: Mapped[float] = mapped_column(Numeric(12, 2), default=0)
+    expenses_count: Mapped[int] = mapped_column(default=0)
+
+
 class Category(BaseDbModel):
+    __table_args__ = (Index("ix_category_aliases", "aliases", postgresql_using="gin"),)
+
     codename: Mapped[str] = mapped_column(String(32), unique=True)
     name: Mapped[str] = mapped_column(String(32))
     aliases: Mapped[list[str]]
@@ -80,7 +103,12 @@ class Assets(BaseDbModel):
 
 
 class Event(BaseDbModel):
-    event_datetime: Mapped[datetime]
+    __table_args__ = (
+        Index("ix_event_event_datetime", "event_datetime"),
+        Index("ix_event_user_id_event_datetime_id", "user_id", "event_datetime", "id"),
+    )
+
+    event_datetime: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     description: Mapped[str] = mapped_column(Text)
     repeat_interval: Mapped[EventRepeatInterval | None] = mapped_column(
         postgresql.ENUM(
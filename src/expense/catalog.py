@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from asyncpg import PostgresError
+from sqlalchemy.exc import NoResultFound, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from telegram import ReplyKeyboardMarkup
+
+from src.core.unitofwork import get_uow
+from src.database import db_helper
+from src.expense.schemes import CategoryScheme
+from src.repository.category import OTHER_CATEGORY_ALIAS
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_CATALOG_CHANNEL = "category_catalog"
+LISTENER_PING_TIMEOUT = 5
+
+
+class CategoryCatalog:
+    """Процессный кэш справочника категорий.
+
+    Хранит категории, индекс псевдоним -> категория и готовую клавиатуру выбора категории.
+    Данные перечитываются из базы по истечении ttl или после явной инвалидации:
+    вызовом invalidate() или уведомлением NOTIFY в канал category_catalog.
+    Потерянное соединение подписки восстанавливается при следующем перечитывании.
+    """
+
+    def __init__(self, ttl: float = 600):
+        self.ttl = ttl
+        self._categories: tuple[CategoryScheme, ...] = ()
+        self._by_alias: dict[str, CategoryScheme] = {}
+        self._keyboard: ReplyKeyboardMarkup | None = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._listen_connection: AsyncConnection | None = None
+        self._listening = False
+        self._listener_lost = False
+
+    async def refresh(self):
+        """Перечитывает категории из базы и перестраивает индекс и клавиатуру."""
+        async with get_uow() as uow:
+            categories = tuple(CategoryScheme.model_validate(category) for category in await uow.category.get_all())
+
+        by_alias = {}
+        for category in categories:
+            for alias in category.aliases:
+                by_alias.setdefault(alias, category)
+
+        self._categories = categories
+        self._by_alias = by_alias
+        self._keyboard = ReplyKeyboardMarkup([[category.name] for category in categories], resize_keyboard=True)
+        self._expires_at = time.monotonic() + self.ttl
+        logger.info(f"Справочник категорий обновлён: {len(categories)} категорий, {len(by_alias)} псевдонимов.")
+
+    def invalidate(self):
+        """Помечает справочник устаревшим, следующее обращение перечитает его из базы."""
+        self._expires_at = 0.0
+
+    async def _ensure_fresh(self):
+        if time.monotonic() < self._expires_at:
+            return
+        async with self._lock:
+            if time.monotonic() < self._expires_at:
+                return
+            await self._ensure_listening()
+            await self.refresh()
+
+    async def get_all(self) -> tuple[CategoryScheme, ...]:
+        await self._ensure_fresh()
+        return self._categories
+
+    async def get_keyboard(self) -> ReplyKeyboardMarkup:
+        await self._ensure_fresh()
+        return self._keyboard
+
+    async def resolve(self, category_alias: str) -> CategoryScheme:
+        """Возвращает категорию по псевдониму, неизвестные псевдонимы попадают в 'прочее'."""
+        await self._ensure_fresh()
+        category = self._by_alias.get(category_alias) or self._by_alias.get(OTHER_CATEGORY_ALIAS)
+        if category is None:
+            raise NoResultFound(f"Категория '{OTHER_CATEGORY_ALIAS}' не найдена.")
+        return category
+
+    async def match(self, words: list[str]) -> CategoryScheme:
+        """Возвращает категорию первого слова, совпавшего с псевдонимом, иначе 'прочее'."""
+        await self._ensure_fresh()
+        for word in words:
+            category = self._by_alias.get(word)
+            if category is not None:
+                return category
+        return await self.resolve(OTHER_CATEGORY_ALIAS)
+
+    def _on_notify(self, *args: Any):
+        logger.info("Получено уведомление об изменении категорий.")
+        self.invalidate()
+
+    def _on_connection_lost(self, *args: Any):
+        logger.warning("Соединение подписки на изменения категорий потеряно, справочник будет перечитан.")
+        self._listener_lost = True
+        self.invalidate()
+
+    async def _connect_listener(self):
+        self._listen_connection = await db_helper.engine.connect()
+        raw_connection = await self._listen_connection.get_raw_connection()
+        await raw_connection.driver_connection.add_listener(CATEGORY_CATALOG_CHANNEL, self._on_notify)
+        raw_connection.driver_connection.add_termination_listener(self._on_connection_lost)
+        self._listener_lost = False
+
+    async def _close_listener(self):
+        if self._listen_connection is None:
+            return
+        connection, self._listen_connection = self._listen_connection, None
+        try:
+            raw_connection = await connection.get_raw_connection()
+            raw_connection.driver_connection.remove_termination_listener(self._on_connection_lost)
+            await raw_connection.driver_connection.remove_listener(CATEGORY_CATALOG_CHANNEL, self._on_notify)
+            await connection.close()
+        except (SQLAlchemyError, PostgresError, OSError):
+            await connection.invalidate()
+
+    async def _ensure_listening(self):
+        """Проверяет соединение подписки и переподключается, если оно потеряно.
+
+        Уведомления, пришедшие без подписки, пропадают, поэтому после переподключения
+        справочник перечитывается.
+        """
+        if not self._listening:
+            return
+        if not self._listener_lost:
+            try:
+                raw_connection = await self._listen_connection.get_raw_connection()
+                # Запрос в обход транзакций SQLAlchemy, чтобы соединение не оставалось в открытой транзакции.
+                await raw_connection.driver_connection.execute("SELECT 1", timeout=LISTENER_PING_TIMEOUT)
+                return
+            except (SQLAlchemyError, PostgresError, OSError, TimeoutError):
+                logger.warning("Соединение подписки на изменения категорий не отвечает.")
+        await self._close_listener()
+        try:
+            await self._connect_listener()
+            logger.info("Подписка на изменения категорий восстановлена.")
+        except (SQLAlchemyError, PostgresError, OSError) as e:
+            self._listener_lost = True
+            logger.error(f"Не удалось восстановить подписку на изменения категорий: {e}")
+
+    async def start_listening(self):
+        """Подписывается на уведомления об изменении категорий из других процессов."""
+        await self._connect_listener()
+        self._listening = True
+
+    async def stop_listening(self):
+        self._listening = False
+        await self._close_listener()
+
+
+category_catalog = CategoryCatalog()
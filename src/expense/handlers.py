@@ -1,6 +1,8 @@
+import tempfile
 from enum import Enum
+from pathlib import Path
 
-import pytz
+from asyncpg import PostgresError
 from sqlalchemy.exc import SQLAlchemyError
 from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
 from telegram.ext import (
@@ -12,17 +14,22 @@ from telegram.ext import (
     filters,
 )
 
-from src.expense.schemes import ExpenseCreateScheme
+from src.expense.catalog import category_catalog
+from src.expense.schemes import ExpenseCreateScheme, ExpenseImportScheme
 from src.expense.service import (
     add_expense,
     delete_expense,
-    get_all_category,
-    get_top_expense,
+    import_expenses,
 )
-from src.expense_statistics.handlers import expense_template
+from src.expense.statement import StatementFormatError, open_statement
+from src.expense_statistics.handlers import send_expenses_history
 from src.handlers import cancel, main_keyboard
 
 
+# Бот может скачать файл не больше 20 МБ.
+STATEMENT_MAX_SIZE = 20 * 1024 * 1024
+
+
 class ExpenseState(Enum):
     AMOUNT = "amount"
     CATEGORY = "category"
@@ -35,26 +42,13 @@ async def delete_expense_start(
     context: ContextTypes.DEFAULT_TYPE,
 ):
     """Начало процесса удаления расходов."""
-    user_telegram_id = update.effective_user.id
-    expenses = await get_top_expense(user_telegram_id)
+    page = await send_expenses_history(update, context)
 
-    if not expenses:
+    if not page.items:
         await update.message.reply_text("У вас пока нет расходов.")
         return ConversationHandler.END
 
-    answer = "Последние 10 трат:\n\n" + "\n".join(
-        expense_template.format(
-            expense_id=expense.id,
-            expense_category=expense.category_name,
-            expense_desc=expense.description or "",
-            expense_amount=expense.amount,
-            expense_dt=expense.created_at.astimezone(pytz.timezone("Europe/Moscow")).strftime("%Y-%m-%d %H:%M:%S"),
-        )
-        for expense in expenses
-    )
-
-    await update.message.reply_text(answer, reply_markup=ReplyKeyboardRemove())
-    await update.message.reply_text("Введите ID траты, которую хотите удалить.")
+    await update.message.reply_text("Введите ID траты, которую хотите удалить.", reply_markup=ReplyKeyboardRemove())
     return ExpenseState.DELETE
 
 
@@ -66,8 +60,10 @@ async def delete_expense_handler(update: Update, context: ContextTypes.DEFAULT_T
         return ExpenseState.DELETE
 
     try:
-        await delete_expense(int(expense_id))
-        await update.message.reply_text(f"Расход {expense_id} успешно удалён.", reply_markup=main_keyboard)
+        if await delete_expense(int(expense_id), update.effective_user.id):
+            await update.message.reply_text(f"Расход {expense_id} успешно удалён.", reply_markup=main_keyboard)
+        else:
+            await update.message.reply_text(f"Расход {expense_id} не найден.", reply_markup=main_keyboard)
     except SQLAlchemyError:
         await update.message.reply_text("Ошибка удаления расхода. Попробуйте снова.")
         return ExpenseState.DELETE
@@ -91,12 +87,9 @@ async def process_amount(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Пожалуйста, введите корректную сумму.")
         return ExpenseState.AMOUNT
 
-    categories = await get_all_category()
-
-    category_keyboard = [[category.name] for category in categories]
     await update.message.reply_text(
         "Введите категорию расхода:",
-        reply_markup=ReplyKeyboardMarkup(category_keyboard, resize_keyboard=True),
+        reply_markup=await category_catalog.get_keyboard(),
     )
     return ExpenseState.CATEGORY
 
@@ -126,7 +119,7 @@ async def process_description(update: Update, context: ContextTypes.DEFAULT_TYPE
         expense = await add_expense(
             expense,
             update.effective_user.id,
-            update.effective_message.id,
+            update.effective_chat.id,
             update.effective_user.first_name,
             update.effective_user.last_name,
         )
@@ -141,10 +134,68 @@ async def process_description(update: Update, context: ContextTypes.DEFAULT_TYPE
     return ConversationHandler.END
 
 
+async def import_statement_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Объясняет формат выписки для загрузки."""
+    await update.message.reply_text(
+        "Отправьте выписку файлом CSV с заголовком и колонками: дата, сумма, описание.\n"
+        "Дата в формате 2024-01-31 или 31.01.2024, категория определяется по словам описания.\n"
+        "Загружаются только списания (сумма со знаком минус), поступления пропускаются.",
+        reply_markup=main_keyboard,
+    )
+
+
+def format_import_result(result: ExpenseImportScheme) -> str:
+    """Формирует итог загрузки выписки."""
+    answer = f"Загружено расходов: {result.imported}."
+    if result.rejected_count:
+        answer += f"\nОтклонено строк: {result.rejected_count}.\n" + "\n".join(
+            f"Строка {row.line}: {row.reason}" for row in result.rejected
+        )
+        if result.rejected_count > len(result.rejected):
+            answer += f"\n...и ещё {result.rejected_count - len(result.rejected)}."
+    return answer
+
+
+async def import_statement(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Загружает расходы из присланной CSV-выписки."""
+    document = update.message.document
+    if document.file_size and document.file_size > STATEMENT_MAX_SIZE:
+        await update.message.reply_text("Файл больше 20 МБ, разбейте выписку на части.")
+        return
+
+    progress_message = await update.message.reply_text("Загружаю выписку...")
+
+    async def on_progress(rows_count: int):
+        await progress_message.edit_text(f"Загружаю выписку... обработано строк: {rows_count}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "statement.csv"
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_drive(path)
+        try:
+            with open_statement(path) as statement:
+                result = await import_expenses(
+                    statement,
+                    update.effective_user.id,
+                    update.effective_chat.id,
+                    update.effective_user.first_name,
+                    update.effective_user.last_name,
+                    on_progress,
+                )
+        except StatementFormatError as error:
+            await progress_message.edit_text(f"Не удалось прочитать выписку: {error}")
+            return
+        except (SQLAlchemyError, PostgresError):
+            await progress_message.edit_text("Ошибка загрузки выписки, расходы не добавлены. Попробуйте снова.")
+            return
+
+    await progress_message.edit_text(format_import_result(result))
+
+
 async def get_finance_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Выводит кнопки с вариантами статистики."""
     finance_keyboard = ReplyKeyboardMarkup(
-        [["Статистика"], ["Добавить расход"], ["Удалить расход"]],
+        [["Статистика"], ["Добавить расход"], ["Удалить расход"], ["Загрузить выписку"]],
         resize_keyboard=True,
         input_field_placeholder="Выбери действие:",
     )
@@ -152,6 +203,8 @@ async def get_finance_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 def register_expense_handler(application: Application):
+    # Состояние диалогов сохраняется, только если у приложения настроено хранилище.
+    persistent = application.persistence is not None
     finance_handler = MessageHandler(filters.Regex("^Финансы$"), get_finance_start)
 
     add_expense_handler = ConversationHandler(
@@ -162,6 +215,8 @@ def register_expense_handler(application: Application):
             ExpenseState.DESCRIPTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, process_description)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
+        name="add_expense",
+        persistent=persistent,
     )
     delete_expense_handler_main = ConversationHandler(
         entry_points=[MessageHandler(filters.Regex("^Удалить расход$"), delete_expense_start)],
@@ -169,7 +224,16 @@ def register_expense_handler(application: Application):
             ExpenseState.DELETE: [MessageHandler(filters.TEXT & ~filters.COMMAND, delete_expense_handler)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
+        name="delete_expense",
+        persistent=persistent,
+    )
+    import_statement_start_handler = MessageHandler(filters.Regex("^Загрузить выписку$"), import_statement_start)
+    import_statement_handler = MessageHandler(
+        filters.Document.FileExtension("csv") | filters.Document.MimeType("text/csv"),
+        import_statement,
     )
     application.add_handler(finance_handler)
     application.add_handler(add_expense_handler)
     application.add_handler(delete_expense_handler_main)
+    application.add_handler(import_statement_start_handler)
+    application.add_handler(import_statement_handler)
@@ -1,12 +1,16 @@
+from dataclasses import dataclass, field
 from datetime import datetime
 
 from pydantic import BaseModel
 
+from src.expense.statement import RejectedRow
+
 
 class CategoryScheme(BaseModel):
     id: int
     codename: str
     name: str
+    aliases: list[str]
     is_base_expense: bool
 
     class Config:
@@ -49,7 +53,8 @@ class UserScheme(BaseModel):
         from_attributes = True
 
 
-class ExpenseTopScheme(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ExpenseTopScheme:
     id: int
     amount: float
     category_name: str
@@ -57,6 +62,21 @@ class ExpenseTopScheme(BaseModel):
     description: str | None
 
 
-class ExpenseStatisticScheme(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ExpensePageScheme:
+    items: list[ExpenseTopScheme]
+    has_older: bool
+    has_newer: bool
+
+
+@dataclass(slots=True, frozen=True)
+class ExpenseStatisticScheme:
     amount: float
     category_name: str
+
+
+@dataclass(slots=True)
+class ExpenseImportScheme:
+    imported: int = 0
+    rejected_count: int = 0
+    rejected: list[RejectedRow] = field(default_factory=list)
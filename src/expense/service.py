@@ -1,13 +1,23 @@
+import time
+from typing import AsyncIterator, Awaitable, Callable, TextIO
+
 from src.core.unitofwork import get_uow
-from src.database import Expense
 from src.database.models import User
+from src.expense.catalog import category_catalog
 from src.expense.schemes import (
     CategoryScheme,
     ExpenseCreateScheme,
+    ExpenseImportScheme,
     ExpenseScheme,
     ExpenseStatisticScheme,
-    ExpenseTopScheme,
 )
+from src.expense.statement import RejectedRow, description_words, read_statement
+from src.expense_statistics.cache import statistics_cache
+
+# Сколько отклонённых строк показывать пользователю, остальные только считаются.
+REJECTED_ROWS_SHOWN = 10
+# Не чаще одного сообщения о прогрессе за интервал, чтобы не упереться в лимиты Telegram.
+IMPORT_PROGRESS_INTERVAL = 2.0
 
 
 async def add_expense(
@@ -17,62 +27,96 @@ async def add_expense(
     firstname: str,
     lastname: str | None,
 ) -> ExpenseScheme:
-    """Добавляет новый расход в базу данных."""
+    """Добавляет новый расход в базу данных одним SQL-запросом.
+
+    Вместе с BEGIN и COMMIT единицы работы это три обращения к базе, при pool_pre_ping -
+    ещё проверка соединения при выдаче из пула.
+    """
     async with get_uow() as uow:
-        category = await uow.category.get_category_by_alias(new_expense.category_name)
         user = User(
             telegram_id=user_telegram_id,
             chat_id=chat_id,
             name=firstname,
             lastname=lastname,
         )
-        user = await uow.user.get_or_create_user_by_tg_id(user)
-        await uow.commit()
-        expense_db = Expense(
-            amount=new_expense.amount,
-            description=new_expense.description,
-            category_id=category.id,
-            user_id=user.id,
+        user_id = uow.user.get_cached_user_id(user_telegram_id)
+        expense = await uow.expense.add_by_category_alias(
+            new_expense.amount,
+            new_expense.description,
+            new_expense.category_name,
+            user,
+            user_id,
         )
-        expense = await uow.expense.add(expense_db)
+        if user_id is None:
+            uow.user.cache_user_id_on_commit(user_telegram_id, expense.user_id)
         await uow.commit()
 
-    return ExpenseScheme(
-        id=expense.id,
-        category_name=category.name,
-        amount=expense.amount,
-        user_id=user.id,
-        category_id=category.id,
-    )
+    await statistics_cache.invalidate(user_telegram_id)
+    return ExpenseScheme.model_validate(expense)
 
 
 async def get_all_category() -> list[CategoryScheme]:
     """Получает список всех категорий."""
-    async with get_uow() as uow:
-        categories = await uow.category.get_all()
-    return [CategoryScheme.model_validate(category) for category in categories]
+    return list(await category_catalog.get_all())
 
 
 async def get_statistics_by_months_count(user_telegram_id: int, months_count: int = 0) -> list[ExpenseStatisticScheme]:
     """Получает статистику расходов пользователя за указанное количество месяцев."""
     async with get_uow() as uow:
         expenses = await uow.expense.get_statistics_by_months_count(user_telegram_id, months_count)
-    return sorted(
-        (ExpenseStatisticScheme.model_validate(exp) for exp in expenses),
-        key=lambda x: x.amount,
-        reverse=True,
-    )
+    return sorted(expenses, key=lambda x: x.amount, reverse=True)
 
 
-async def get_top_expense(user_telegram_id: int, count: int = 10) -> list[ExpenseTopScheme]:
-    """Возвращает топ-N самых крупных расходов пользователя."""
+async def delete_expense(expense_id: int, user_telegram_id: int) -> bool:
+    """Удаляет расход пользователя по ID."""
     async with get_uow() as uow:
-        expenses = await uow.expense.get_top_expenses(user_telegram_id, count)
-    return [ExpenseTopScheme.model_validate(stat) for stat in expenses]
+        deleted = await uow.expense.delete_user_expense(expense_id, user_telegram_id)
+        await uow.commit()
+    if deleted:
+        await statistics_cache.invalidate(user_telegram_id)
+    return deleted
 
 
-async def delete_expense(expense_id: int):
-    """Удаляет расход по ID."""
+async def import_expenses(
+    statement: TextIO,
+    user_telegram_id: int,
+    chat_id: int,
+    firstname: str,
+    lastname: str | None,
+    on_progress: Callable[[int], Awaitable[None]] | None = None,
+) -> ExpenseImportScheme:
+    """Загружает расходы из CSV-выписки одной транзакцией.
+
+    Строки читаются и отправляются в COPY потоково, поэтому память не зависит от размера файла.
+    Категория определяется по словам описания через псевдонимы категорий.
+    """
+    result = ExpenseImportScheme()
+
     async with get_uow() as uow:
-        await uow.expense.delete(expense_id)
+        user = User(telegram_id=user_telegram_id, chat_id=chat_id, name=firstname, lastname=lastname)
+        user_id = await uow.user.get_or_create_user_id(user)
+
+        async def records() -> AsyncIterator[tuple]:
+            progress_at = time.monotonic() + IMPORT_PROGRESS_INTERVAL
+            for row in read_statement(statement):
+                if isinstance(row, RejectedRow):
+                    result.rejected_count += 1
+                    if len(result.rejected) < REJECTED_ROWS_SHOWN:
+                        result.rejected.append(row)
+                    continue
+
+                words = description_words(row.description) if row.description else []
+                category = await category_catalog.match(words)
+                result.imported += 1
+                yield row.amount, row.description, user_id, category.id, row.created_at
+
+                if on_progress is not None and time.monotonic() >= progress_at:
+                    await on_progress(result.imported)
+                    progress_at = time.monotonic() + IMPORT_PROGRESS_INTERVAL
+
+        result.imported = await uow.expense.copy_expenses(records())
         await uow.commit()
+
+    if result.imported:
+        await statistics_cache.invalidate(user_telegram_id)
+    return result
@@ -0,0 +1,123 @@
+import codecs
+import csv
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from src.utils import DEFAULT_TIMEZONE, get_zone
+
+STATEMENT_TIMEZONE = get_zone(DEFAULT_TIMEZONE)
+
+DATE_COLUMNS = ("date", "дата", "дата операции")
+AMOUNT_COLUMNS = ("amount", "сумма", "сумма операции")
+DESCRIPTION_COLUMNS = ("description", "описание", "назначение")
+
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y")
+
+MAX_AMOUNT = Decimal("99999999.99")
+
+WORD_RE = re.compile(r"\w+")
+
+
+class StatementFormatError(ValueError):
+    """Заголовок выписки не содержит нужных колонок."""
+
+
+@dataclass(slots=True, frozen=True)
+class StatementRow:
+    line: int
+    created_at: datetime
+    amount: Decimal
+    description: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class RejectedRow:
+    line: int
+    reason: str
+
+
+def _find_column(header: list[str], names: tuple[str, ...], required: bool = True) -> int | None:
+    normalized = [column.strip().lower() for column in header]
+    for name in names:
+        if name in normalized:
+            return normalized.index(name)
+    if required:
+        raise StatementFormatError(f"В выписке нет колонки '{names[0]}' ({', '.join(names[1:])}).")
+    return None
+
+
+def _parse_datetime(value: str) -> datetime:
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).replace(tzinfo=STATEMENT_TIMEZONE)
+        except ValueError:
+            continue
+    raise ValueError(f"неизвестный формат даты '{value}'")
+
+
+def _parse_amount(value: str) -> Decimal:
+    """Сумма списания: расходы в выписке записаны со знаком минус, поступления отклоняются."""
+    try:
+        amount = Decimal(value.replace("\xa0", "").replace(" ", "").replace(",", ".").replace("−", "-"))
+    except InvalidOperation:
+        raise ValueError(f"некорректная сумма '{value}'") from None
+    if not amount.is_finite():
+        raise ValueError(f"некорректная сумма '{value}'")
+    if amount > 0:
+        raise ValueError(f"поступление, а не расход '{value}'")
+    amount = -amount
+    if not amount or amount > MAX_AMOUNT:
+        raise ValueError(f"сумма вне допустимого диапазона '{value}'")
+    return amount.quantize(Decimal("0.01"))
+
+
+def open_statement(path: Path) -> TextIO:
+    """Открывает выписку в UTF-8, а если начало файла в ней не читается - в cp1251."""
+    with path.open("rb") as file:
+        head = file.read(64 * 1024)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "cp1251"
+    return path.open(encoding=encoding, newline="")
+
+
+def description_words(description: str) -> list[str]:
+    """Слова описания в нижнем регистре для поиска категории по псевдонимам."""
+    return WORD_RE.findall(description.lower())
+
+
+def read_statement(file: TextIO) -> Iterator[StatementRow | RejectedRow]:
+    """Построчно читает CSV-выписку.
+
+    Разделитель (',' или ';') определяется по заголовку. Для каждой строки возвращает
+    StatementRow или RejectedRow с причиной отказа, файл целиком в память не читается.
+    """
+    header_line = file.readline()
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+    date_column = _find_column(header, DATE_COLUMNS)
+    amount_column = _find_column(header, AMOUNT_COLUMNS)
+    description_column = _find_column(header, DESCRIPTION_COLUMNS, required=False)
+
+    for line, row in enumerate(csv.reader(file, delimiter=delimiter), start=2):
+        if not any(row):
+            continue
+        try:
+            created_at = _parse_datetime(row[date_column])
+            amount = _parse_amount(row[amount_column])
+        except IndexError:
+            yield RejectedRow(line, "не хватает колонок")
+            continue
+        except ValueError as error:
+            yield RejectedRow(line, str(error))
+            continue
+        has_description = description_column is not None and description_column < len(row)
+        description = row[description_column].strip() if has_description else ""
+        yield StatementRow(line, created_at, amount, description or None)
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from src.configs import settings
+from src.core.cache import CacheBackend, create_cache_backend
+from src.repository.expense import ROLLUP_TIMEZONE
+
+
+class StatisticsCache:
+    """Кэш посчитанной статистики и готовых ответов пользователя.
+
+    Ключ записи содержит номер версии пользователя: добавление или удаление расхода
+    увеличивает версию, и старые записи перестают читаться, пока не истечёт их TTL.
+    """
+
+    def __init__(self, backend_factory: Callable[[], CacheBackend], ttl: int | None = None):
+        self._backend_factory = backend_factory
+        self._backend: CacheBackend | None = None
+        self._ttl = ttl
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Хранилище создаётся при первом обращении, чтобы импорт не читал настройки."""
+        if self._backend is None:
+            self._backend = self._backend_factory()
+        return self._backend
+
+    @property
+    def ttl(self) -> int:
+        return self._ttl if self._ttl is not None else settings.cache.statistics_ttl
+
+    @staticmethod
+    def _version_key(user_telegram_id: int) -> str:
+        return f"stats:version:{user_telegram_id}"
+
+    @staticmethod
+    def period_key(months_count: int) -> str:
+        """Ключ периода, который меняется со сменой месяца в часовом поясе месячного агрегата."""
+        return f"{datetime.now(ROLLUP_TIMEZONE):%Y-%m}:{months_count}"
+
+    async def cached(
+        self,
+        user_telegram_id: int,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        decode: Callable[[Any], Any] | None = None,
+    ) -> Any:
+        """Возвращает значение из кэша или вычисляет его через loader и сохраняет.
+
+        decode восстанавливает из прочитанного JSON тот же тип, что возвращает loader.
+        """
+        version = await self.backend.get_counter(self._version_key(user_telegram_id))
+        entry_key = f"stats:{user_telegram_id}:{version}:{key}"
+        value = await self.backend.get(entry_key)
+        if value is not None:
+            value = orjson.loads(value)
+            return decode(value) if decode is not None else value
+
+        result = await loader()
+        await self.backend.set(entry_key, orjson.dumps(result), self.ttl)
+        return result
+
+    async def invalidate(self, user_telegram_id: int):
+        await self.backend.incr(self._version_key(user_telegram_id))
+
+    async def close(self):
+        if self._backend is not None:
+            await self._backend.close()
+
+
+statistics_cache = StatisticsCache(lambda: create_cache_backend(settings.cache, settings.redis))
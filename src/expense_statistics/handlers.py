@@ -1,6 +1,6 @@
 from enum import Enum
+from zoneinfo import ZoneInfo
 
-import pytz
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     Application,
@@ -10,11 +10,14 @@ from telegram.ext import (
     filters,
 )
 
+from src.expense.schemes import ExpensePageScheme
+from src.expense_statistics.cache import statistics_cache
 from src.expense_statistics.service import (
+    get_expenses_page,
     get_statistics_by_months_count,
-    get_top_expense,
 )
 from src.handlers import main_keyboard
+from src.users.service import get_user_timezone
 
 
 class StatisticState(Enum):
@@ -23,6 +26,8 @@ class StatisticState(Enum):
     TOP_EXPENSE = "top_expense"
 
 
+EXPENSE_HISTORY_CALLBACK = "expense_history"
+
 expense_template = "Трата {expense_id}:\n\tКатегория: {expense_category}\n\tОписание: {expense_desc}\n\tСумма: {expense_amount}\n\tДата и время: {expense_dt}\n\n"
 
 
@@ -37,7 +42,7 @@ async def get_statistic_start(update: Update, context: ContextTypes.DEFAULT_TYPE
     await update.message.reply_text("Выберите вид отчёта:", reply_markup=keyboards)
 
 
-async def _generate_statistics_answer(user_telegram_id: int, months: int = 0) -> str:
+async def _render_statistics_answer(user_telegram_id: int, months: int = 0) -> str:
     """Формирует текст статистики по категориям."""
     statistics = await get_statistics_by_months_count(user_telegram_id, months)
     resume = sum(stat.amount for stat in statistics)
@@ -45,6 +50,15 @@ async def _generate_statistics_answer(user_telegram_id: int, months: int = 0) ->
     return f"Статистика по категориям\n\n{stats_text}\n\nИтого: {resume}"
 
 
+async def _generate_statistics_answer(user_telegram_id: int, months: int = 0) -> str:
+    """Возвращает текст статистики по категориям из кэша или формирует его заново."""
+    return await statistics_cache.cached(
+        user_telegram_id,
+        f"answer:{statistics_cache.period_key(months)}",
+        lambda: _render_statistics_answer(user_telegram_id, months),
+    )
+
+
 async def get_month_stat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Отправляет статистику за текущий месяц."""
     await update.callback_query.answer()
@@ -61,24 +75,73 @@ async def get_three_months_stat(update: Update, context: ContextTypes.DEFAULT_TY
     await context.bot.send_message(chat_id=update.effective_chat.id, text=answer, reply_markup=main_keyboard)
 
 
-async def get_top_expense_stat(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Выводит топ-10 трат пользователя."""
-    await update.callback_query.answer()
-    user_telegram_id = update.effective_user.id
-    statistics = await get_top_expense(user_telegram_id)
+def format_expenses_page(page: ExpensePageScheme, timezone: ZoneInfo) -> str:
+    """Формирует текст страницы истории расходов во времени пользователя."""
+    if not page.items:
+        return "Больше трат нет."
 
-    answer = "Последние 10 трат:\n\n" + "\n".join(
+    title = "Более ранние траты" if page.has_newer else "Последние 10 трат"
+    return f"{title}:\n\n" + "\n".join(
         expense_template.format(
-            expense_id=stat.id,
-            expense_category=stat.category_name,
-            expense_desc=stat.description or "",
-            expense_amount=stat.amount,
-            expense_dt=stat.created_at.astimezone(pytz.timezone("Europe/Moscow")).strftime("%Y-%m-%d %H:%M:%S"),
+            expense_id=expense.id,
+            expense_category=expense.category_name,
+            expense_desc=expense.description or "",
+            expense_amount=expense.amount,
+            expense_dt=expense.created_at.astimezone(timezone).strftime("%Y-%m-%d %H:%M:%S"),
         )
-        for stat in statistics
+        for expense in page.items
     )
 
-    await context.bot.send_message(chat_id=update.effective_chat.id, text=answer, reply_markup=main_keyboard)
+
+def expenses_page_keyboard(page: ExpensePageScheme) -> InlineKeyboardMarkup | None:
+    """Кнопки перехода к соседним страницам истории расходов."""
+    buttons = []
+    if page.items and page.has_newer:
+        buttons.append(
+            InlineKeyboardButton("⬅️ Новее", callback_data=f"{EXPENSE_HISTORY_CALLBACK}:newer:{page.items[0].id}")
+        )
+    if page.items and page.has_older:
+        buttons.append(
+            InlineKeyboardButton("Старее ➡️", callback_data=f"{EXPENSE_HISTORY_CALLBACK}:older:{page.items[-1].id}")
+        )
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+async def send_expenses_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> ExpensePageScheme:
+    """Отправляет первую страницу истории расходов пользователя."""
+    page = await get_expenses_page(update.effective_user.id)
+    if page.items:
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=format_expenses_page(page, await get_user_timezone(update.effective_user.id)),
+            reply_markup=expenses_page_keyboard(page),
+        )
+    return page
+
+
+async def get_expenses_history_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показывает соседнюю страницу истории расходов в том же сообщении."""
+    query = update.callback_query
+    await query.answer()
+    _, direction, expense_id = query.data.split(":")
+    if direction == "older":
+        page = await get_expenses_page(update.effective_user.id, before_id=int(expense_id))
+    else:
+        page = await get_expenses_page(update.effective_user.id, after_id=int(expense_id))
+    timezone = await get_user_timezone(update.effective_user.id)
+    await query.edit_message_text(text=format_expenses_page(page, timezone), reply_markup=expenses_page_keyboard(page))
+
+
+async def get_top_expense_stat(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Выводит последние траты пользователя с переходом к более ранним."""
+    await update.callback_query.answer()
+    page = await send_expenses_history(update, context)
+    if not page.items:
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text="У вас пока нет расходов.",
+            reply_markup=main_keyboard,
+        )
 
 
 def register_statistic_handler(application: Application):
@@ -87,8 +150,12 @@ def register_statistic_handler(application: Application):
         get_three_months_stat, pattern="^" + StatisticState.THREE_MONTHS_STAT.value + "$"
     )
     top_stat_handler = CallbackQueryHandler(get_top_expense_stat, pattern="^" + StatisticState.TOP_EXPENSE.value + "$")
+    history_page_handler = CallbackQueryHandler(
+        get_expenses_history_page, pattern="^" + EXPENSE_HISTORY_CALLBACK + ":(older|newer):[0-9]+$"
+    )
     stat_handler = MessageHandler(filters.Regex("^Статистика$"), get_statistic_start)
     application.add_handler(stat_handler)
     application.add_handler(three_month_stat_handler)
     application.add_handler(month_stat_handler)
     application.add_handler(top_stat_handler)
+    application.add_handler(history_page_handler)
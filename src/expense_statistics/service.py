@@ -1,23 +1,37 @@
 from src.core.unitofwork import get_uow
-from src.expense.schemes import (
-    ExpenseStatisticScheme,
-    ExpenseTopScheme,
-)
+from src.expense.schemes import ExpensePageScheme, ExpenseStatisticScheme
+from src.expense_statistics.cache import statistics_cache
 
 
 async def get_statistics_by_months_count(user_telegram_id: int, months_count: int = 0) -> list[ExpenseStatisticScheme]:
     """Получает статистику расходов пользователя за указанное количество месяцев."""
-    async with get_uow() as uow:
-        expenses = await uow.expense.get_statistics_by_months_count(user_telegram_id, months_count)
-    return sorted(
-        (ExpenseStatisticScheme.model_validate(exp) for exp in expenses),
-        key=lambda x: x.amount,
-        reverse=True,
+
+    async def load_statistics():
+        async with get_uow() as uow:
+            return await uow.expense.get_statistics_by_months_count(user_telegram_id, months_count)
+
+    expenses = await statistics_cache.cached(
+        user_telegram_id,
+        f"statistics:{statistics_cache.period_key(months_count)}",
+        load_statistics,
+        decode=lambda rows: [ExpenseStatisticScheme(**row) for row in rows],
     )
+    return sorted(expenses, key=lambda x: x.amount, reverse=True)
 
 
-async def get_top_expense(user_telegram_id: int, count: int = 10) -> list[ExpenseTopScheme]:
-    """Возвращает топ-N самых крупных расходов пользователя."""
+async def get_expenses_page(
+    user_telegram_id: int,
+    before_id: int | None = None,
+    after_id: int | None = None,
+    limit: int = 10,
+) -> ExpensePageScheme:
+    """Возвращает страницу расходов пользователя, от новых к старым."""
     async with get_uow() as uow:
-        expenses = await uow.expense.get_top_expenses(user_telegram_id, count)
-    return [ExpenseTopScheme.model_validate(stat) for stat in expenses]
+        expenses = await uow.expense.get_expenses_page(user_telegram_id, before_id, after_id, limit)
+
+    items = expenses[:limit]
+    has_more = len(expenses) > limit
+    if after_id is not None:
+        items.reverse()
+        return ExpensePageScheme(items=items, has_older=True, has_newer=has_more)
+    return ExpensePageScheme(items=items, has_older=has_more, has_newer=before_id is not None)
@@ -0,0 +1,161 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from telegram import Update
+from telegram.ext import Application, BaseHandler, ContextTypes, ConversationHandler, TypeHandler
+from telegram.request import HTTPXRequest
+
+from src.database.db_helper import PoolStatsCollector, db_helper
+
+logger = logging.getLogger(__name__)
+
+FIRST_GROUP = -100
+LAST_GROUP = 100
+# Сколько SQL-запросов запоминается для лога медленного обновления.
+MAX_LOGGED_STATEMENTS = 20
+UNHANDLED = "unhandled"
+
+registry = CollectorRegistry()
+registry.register(PoolStatsCollector(db_helper))
+
+# Гистограммы, а не Summary: Summary в prometheus_client не считает квантили,
+# а по корзинам гистограммы их даёт histogram_quantile.
+update_duration = Histogram(
+    "bot_update_duration_seconds", "Время обработки обновления.", ["handler"], registry=registry
+)
+update_db_duration = Histogram(
+    "bot_update_db_duration_seconds", "Время SQL-запросов за обновление.", ["handler"], registry=registry
+)
+update_telegram_duration = Histogram(
+    "bot_update_telegram_duration_seconds", "Время запросов к Bot API за обновление.", ["handler"], registry=registry
+)
+update_statements = Counter(
+    "bot_update_db_statements_total",
+    "SQL-запросы, выполненные при обработке обновлений.",
+    ["handler"],
+    registry=registry,
+)
+updates_total = Counter("bot_updates_total", "Обработанные обновления.", ["handler"], registry=registry)
+slow_updates = Counter(
+    "bot_slow_updates_total", "Обновления, обработка которых превысила порог.", ["handler"], registry=registry
+)
+
+
+@dataclass(slots=True)
+class UpdateTrace:
+    started: float
+    handler: str | None = None
+    db_time: float = 0.0
+    statement_count: int = 0
+    telegram_time: float = 0.0
+    statements: list[tuple[float, str]] = field(default_factory=list)
+
+
+current_trace: ContextVar[UpdateTrace | None] = ContextVar("current_trace", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_trace.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = current_trace.get()
+    if trace is None or not conn.info.get("query_started"):
+        return
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    trace.db_time += elapsed
+    trace.statement_count += 1
+    if len(trace.statements) < MAX_LOGGED_STATEMENTS:
+        trace.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Подключает подсчёт SQL-запросов обновления к движку."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """Запросы к Bot API, время которых учитывается в текущем обновлении."""
+
+    async def do_request(self, *args, **kwargs):
+        trace = current_trace.get()
+        if trace is None:
+            return await super().do_request(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await super().do_request(*args, **kwargs)
+        finally:
+            trace.telegram_time += time.perf_counter() - started
+
+
+def _named_callback(callback, name: str):
+    @wraps(callback)
+    async def wrapper(update, context):
+        trace = current_trace.get()
+        if trace is not None and trace.handler is None:
+            trace.handler = name
+        return await callback(update, context)
+
+    return wrapper
+
+
+def _instrument_handler(handler: BaseHandler):
+    if isinstance(handler, ConversationHandler):
+        for nested in (*handler.entry_points, *handler.fallbacks):
+            _instrument_handler(nested)
+        for handlers in handler.states.values():
+            for nested in handlers:
+                _instrument_handler(nested)
+    elif not isinstance(handler, TypeHandler):
+        handler.callback = _named_callback(handler.callback, handler.callback.__qualname__)
+
+
+class UpdateInstrumentation:
+    """Замеряет обработку каждого обновления обработчиками первой и последней группы.
+
+    Первая группа открывает замер, последняя закрывает его и пишет метрики по имени
+    сработавшего обработчика. Обновления дольше slow_threshold логируются вместе с SQL.
+    """
+
+    def __init__(self, slow_threshold: float):
+        self.slow_threshold = slow_threshold
+
+    async def begin(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        current_trace.set(UpdateTrace(started=time.perf_counter()))
+
+    async def finish(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        trace = current_trace.get()
+        if trace is None:
+            return
+        current_trace.set(None)
+        elapsed = time.perf_counter() - trace.started
+        handler = trace.handler or UNHANDLED
+        updates_total.labels(handler=handler).inc()
+        update_duration.labels(handler=handler).observe(elapsed)
+        update_db_duration.labels(handler=handler).observe(trace.db_time)
+        update_telegram_duration.labels(handler=handler).observe(trace.telegram_time)
+        update_statements.labels(handler=handler).inc(trace.statement_count)
+        if elapsed >= self.slow_threshold:
+            slow_updates.labels(handler=handler).inc()
+            statements = "".join(f"\n  {duration * 1000:.1f} мс: {sql}" for duration, sql in trace.statements)
+            logger.warning(
+                f"Медленное обновление {update.update_id}, обработчик {handler}: {elapsed * 1000:.0f} мс, "
+                f"SQL {trace.db_time * 1000:.0f} мс ({trace.statement_count} запросов), "
+                f"Bot API {trace.telegram_time * 1000:.0f} мс{statements}"
+            )
+
+    def register(self, application: Application):
+        """Вызывается после регистрации всех обработчиков приложения."""
+        for handlers in application.handlers.values():
+            for handler in handlers:
+                _instrument_handler(handler)
+        application.add_handler(TypeHandler(Update, self.begin), group=FIRST_GROUP)
+        application.add_handler(TypeHandler(Update, self.finish), group=LAST_GROUP)
@@ -2,12 +2,15 @@ import logging
 from enum import Enum
 
 from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
     ReplyKeyboardMarkup,
     ReplyKeyboardRemove,
     Update,
 )
 from telegram.ext import (
     Application,
+    CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     ConversationHandler,
@@ -17,11 +20,21 @@ from telegram.ext import (
 
 from src.handlers import cancel, main_keyboard
 from src.reminders import services as event_service
-from src.reminders.schemes import EventCreateScheme, EventRepeatInterval
-from src.reminders.utils import format_event_list
+from src.reminders.schemes import EventCreateScheme, EventPageScheme, EventRepeatInterval
+from src.reminders.utils import (
+    decode_page_key,
+    encode_page_key,
+    fit_events_page,
+    format_date_time,
+    parse_date_time,
+)
+from src.users.service import get_user_timezone
 
 logger = logging.getLogger(__name__)
 
+EVENTS_PAGE_CALLBACK = "events_page"
+EVENTS_PAGE_TITLE = "Ваши события:\n\n"
+
 
 class EventDialogStates(Enum):
     SELECT_ACTION = "select_action"
@@ -118,9 +131,10 @@ async def confirm_event_submission(update: Update, context: ContextTypes.DEFAULT
         if confirmation != "да":
             await update.message.reply_text("Добавление события отменено. ❌")
             return ConversationHandler.END
+        timezone = await get_user_timezone(update.effective_user.id)
         event = EventCreateScheme(
             description=context.user_data.get("description"),
-            event_datetime=context.user_data.get("event_datetime"),
+            event_datetime=parse_date_time(context.user_data.get("event_datetime"), timezone),
             repeat_interval=context.user_data.get("repeat_interval"),
             message_count=context.user_data.get("message_count"),
         )
@@ -134,7 +148,7 @@ async def confirm_event_submission(update: Update, context: ContextTypes.DEFAULT
         )
         if result_event:
             await update.message.reply_text(
-                f"Событие успешно добавлено! ✅\n📅 {result_event.description}\n⏰ {result_event.event_datetime}",
+                f"Событие успешно добавлено! ✅\n📅 {result_event.description}\n⏰ {format_date_time(result_event.event_datetime, timezone)}",
                 reply_markup=main_keyboard,
             )
         else:
@@ -149,17 +163,57 @@ async def confirm_event_submission(update: Update, context: ContextTypes.DEFAULT
         return ConversationHandler.END
 
 
+def events_page_keyboard(page: EventPageScheme) -> InlineKeyboardMarkup | None:
+    """Кнопки перехода к соседним страницам списка событий."""
+    buttons = []
+    if page.items and page.has_earlier:
+        buttons.append(
+            InlineKeyboardButton(
+                "⬅️ Раньше", callback_data=f"{EVENTS_PAGE_CALLBACK}:earlier:{encode_page_key(page.items[0])}"
+            )
+        )
+    if page.items and page.has_later:
+        buttons.append(
+            InlineKeyboardButton(
+                "Позже ➡️", callback_data=f"{EVENTS_PAGE_CALLBACK}:later:{encode_page_key(page.items[-1])}"
+            )
+        )
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+async def send_events_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> EventPageScheme:
+    """Отправляет первую страницу событий пользователя."""
+    page = await event_service.get_events_page(update.effective_user.id)
+    if page.items:
+        timezone = await get_user_timezone(update.effective_user.id)
+        text, page = fit_events_page(page, timezone, EVENTS_PAGE_TITLE)
+        await update.message.reply_text(text, reply_markup=events_page_keyboard(page))
+    else:
+        await update.message.reply_text("У вас нет запланированных событий. 📋", reply_markup=main_keyboard)
+    return page
+
+
+async def get_list_events_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показывает соседнюю страницу событий в том же сообщении."""
+    query = update.callback_query
+    await query.answer()
+    _, direction, page_key = query.data.split(":", 2)
+    key = decode_page_key(page_key)
+    if direction == "earlier":
+        page = await event_service.get_events_page(update.effective_user.id, before=key)
+    else:
+        page = await event_service.get_events_page(update.effective_user.id, after=key)
+    if not page.items:
+        await query.edit_message_text("Больше событий нет.")
+        return
+    timezone = await get_user_timezone(update.effective_user.id)
+    text, page = fit_events_page(page, timezone, EVENTS_PAGE_TITLE, from_end=direction == "earlier")
+    await query.edit_message_text(text, reply_markup=events_page_keyboard(page))
+
+
 async def get_list_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        events = await event_service.get_all_events(update.effective_user.id)
-        if events:
-            message = format_event_list(events)
-        else:
-            message = "У вас нет запланированных событий. 📋"
-        await update.message.reply_text(
-            text=message,
-            reply_markup=main_keyboard,
-        )
+        await send_events_page(update, context)
         return ConversationHandler.END
     except Exception as e:
         logger.error(f"Ошибка при получении списка событий: {e}")
@@ -169,15 +223,10 @@ async def get_list_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def delete_event_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        events = await event_service.get_all_events(update.effective_user.id)
-        if events:
-            message = format_event_list(events)
-        else:
-            message = "У вас нет запланированных событий. 📋"
-            await update.message.reply_text(message, reply_markup=main_keyboard)
+        page = await send_events_page(update, context)
+        if not page.items:
             return ConversationHandler.END
-        await update.message.reply_text(message, reply_markup=ReplyKeyboardRemove())
-        await update.message.reply_text("Введите id событие для удаления:")
+        await update.message.reply_text("Введите id событие для удаления:", reply_markup=ReplyKeyboardRemove())
         return EventDialogStates.DELETE_EVENT
     except Exception as e:
         logger.error(f"Ошибка при старте удаления события: {e}")
@@ -201,15 +250,10 @@ async def delete_event(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def edit_event_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        events = await event_service.get_all_events(update.effective_user.id)
-        if events:
-            message = format_event_list(events)
-        else:
-            message = "У вас нет запланированных событий. 📋"
-            await update.message.reply_text(message, reply_markup=main_keyboard)
+        page = await send_events_page(update, context)
+        if not page.items:
             return ConversationHandler.END
-        await update.message.reply_text(message, reply_markup=ReplyKeyboardRemove())
-        await update.message.reply_text("Введите id события для редактирования:")
+        await update.message.reply_text("Введите id события для редактирования:", reply_markup=ReplyKeyboardRemove())
         return EventDialogStates.EDIT_EVENT
     except Exception as e:
         logger.error(f"Ошибка при старте редактирования события: {e}")
@@ -299,7 +343,8 @@ async def confirm_edit_submission(update: Update, context: ContextTypes.DEFAULT_
         repeat_interval = context.user_data.get("edit_repeat_interval")
         event_id = int(context.user_data.get("event_id"))
 
-        result = await event_service.update_event(event_id, description, event_datetime, repeat_interval)
+        timezone = await get_user_timezone(update.effective_user.id)
+        result = await event_service.update_event(event_id, description, event_datetime, repeat_interval, timezone)
         if result:
             await update.message.reply_text(
                 f"Событие с ID={event_id} успешно обновлено! ✅", reply_markup=main_keyboard
@@ -323,6 +368,7 @@ async def start_reminders_handler(update: Update, context: ContextTypes.DEFAULT_
 
 
 def register_reminder_handler(application: Application):
+    persistent = application.persistence is not None
     start_handler = MessageHandler(filters.Regex("^Напоминания$"), start_reminders_handler)
 
     add_event_handler = ConversationHandler(
@@ -341,6 +387,8 @@ def register_reminder_handler(application: Application):
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
+        name="add_event",
+        persistent=persistent,
     )
 
     edit_event_handler = ConversationHandler(
@@ -357,6 +405,8 @@ def register_reminder_handler(application: Application):
             EventDialogStates.CONFIRM_EDIT: [MessageHandler(filters.TEXT & ~filters.COMMAND, confirm_edit_submission)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
+        name="edit_event",
+        persistent=persistent,
     )
     delete_event_handler = ConversationHandler(
         entry_points=[MessageHandler(filters.Regex("^Удалить напоминание$"), delete_event_start)],
@@ -364,10 +414,16 @@ def register_reminder_handler(application: Application):
             EventDialogStates.DELETE_EVENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, delete_event)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
+        name="delete_event",
+        persistent=persistent,
     )
     list_events_handler = MessageHandler(filters.Regex("^Посмотреть напоминания$"), get_list_events)
+    events_page_handler = CallbackQueryHandler(
+        get_list_events_page, pattern="^" + EVENTS_PAGE_CALLBACK + ":(earlier|later):-?[0-9]+:[0-9]+$"
+    )
     application.add_handler(start_handler)
     application.add_handler(add_event_handler)
     application.add_handler(edit_event_handler)
     application.add_handler(delete_event_handler)
     application.add_handler(list_events_handler)
+    application.add_handler(events_page_handler)
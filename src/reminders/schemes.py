@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
@@ -28,3 +29,22 @@ class EventScheme(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+@dataclass(slots=True, frozen=True)
+class EventPageScheme:
+    items: list[EventScheme]
+    has_earlier: bool
+    has_later: bool
+
+
+@dataclass(slots=True, frozen=True)
+class DueEventScheme:
+    id: int
+    event_datetime: datetime
+    description: str
+    repeat_interval: EventRepeatInterval | None
+    message_count: int
+    user_telegram_id: int
+    occurrence: datetime
+    next_occurrence: datetime | None
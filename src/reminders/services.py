@@ -1,12 +1,16 @@
 import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
 from src.core.unitofwork import get_uow
 from src.database.models import Event, User
-from src.reminders.schemes import EventCreateScheme, EventRepeatInterval, EventScheme
+from src.reminders.schemes import EventCreateScheme, EventPageScheme, EventRepeatInterval, EventScheme
 from src.reminders.utils import parse_date_time
 
 logger = logging.getLogger(__name__)
 
+EVENTS_PAGE_SIZE = 10
+
 
 async def add_event_by_tg(
     event: EventCreateScheme,
@@ -22,10 +26,9 @@ async def add_event_by_tg(
             name=firstname,
             lastname=lastname,
         )
-        user = await uow.user.get_or_create_user_by_tg_id(user)
-        await uow.commit()
+        user_id = await uow.user.get_or_create_user_id(user)
         new_event = Event(
-            user_id=user.id,
+            user_id=user_id,
             description=event.description,
             event_datetime=event.event_datetime,
             repeat_interval=event.repeat_interval,
@@ -36,14 +39,22 @@ async def add_event_by_tg(
         return EventScheme.model_validate(new_event)
 
 
-async def get_all_events(user_tg_id: int) -> tuple[EventScheme, ...]:
-    try:
-        async with get_uow() as uow:
-            events = await uow.event.get_all_by_user_tg(user_tg_id)
-            return tuple(EventScheme.model_validate(event) for event in events)
-    except Exception as e:
-        logger.error(f"Ошибка при получении событий: {e}")
-        return tuple()
+async def get_events_page(
+    user_tg_id: int,
+    after: tuple[datetime, int] | None = None,
+    before: tuple[datetime, int] | None = None,
+    limit: int = EVENTS_PAGE_SIZE,
+) -> EventPageScheme:
+    """Возвращает страницу событий пользователя по возрастанию даты."""
+    async with get_uow() as uow:
+        events = await uow.event.get_page_by_user_tg(user_tg_id, after, before, limit)
+        items = [EventScheme.model_validate(event) for event in events[:limit]]
+
+    has_more = len(events) > limit
+    if before is not None:
+        items.reverse()
+        return EventPageScheme(items=items, has_earlier=has_more, has_later=True)
+    return EventPageScheme(items=items, has_earlier=after is not None, has_later=has_more)
 
 
 async def delete_event(event_id: int, user_tg_id: int) -> bool:
@@ -62,8 +73,9 @@ async def update_event(
     description: str,
     date_time_str: str,
     repeat_interval: EventRepeatInterval | None,
+    timezone: ZoneInfo,
 ) -> EventScheme | None:
-    date_time = parse_date_time(date_time_str)
+    date_time = parse_date_time(date_time_str, timezone)
     if not date_time:
         return None
 
@@ -72,7 +84,7 @@ async def update_event(
             int(event_id),
             EventCreateScheme(
                 description=description,
-                event_datetime=date_time_str,
+                event_datetime=date_time,
                 repeat_interval=repeat_interval,
             ).dict(exclude_unset=True),
         )
@@ -1,22 +1,80 @@
 import logging
-from datetime import datetime
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from zoneinfo import ZoneInfo
 
-from src.reminders.schemes import EventScheme
+from telegram.constants import MessageLimit
+
+from src.reminders.schemes import EventPageScheme, EventScheme
 
 logger = logging.getLogger(__name__)
 
+DATE_TIME_FORMAT = "%Y-%m-%d %H:%M"
+# Длинное описание обрезается, чтобы любое событие помещалось в сообщение целиком.
+MAX_DESCRIPTION_LENGTH = 1000
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
 
-def parse_date_time(date_time_str: str):
+def parse_date_time(date_time_str: str, timezone: ZoneInfo | None = None):
+    """Дата и время, введённые пользователем, в его часовом поясе."""
     try:
-        return datetime.strptime(date_time_str, "%Y-%m-%d %H:%M")
+        return datetime.strptime(date_time_str, DATE_TIME_FORMAT).replace(tzinfo=timezone)
     except ValueError:
         return None
 
 
-def format_event_list(events: tuple[EventScheme, ...]):
-    return "\n".join(
-        [
-            f"📅 ID:{e.id}\nОписание: {e.description}\nВремя события: {e.event_datetime}\nПовтор: {e.repeat_interval.value if e.repeat_interval else 'однократное'}\n"
-            for e in events
-        ]
+def format_date_time(value: datetime, timezone: ZoneInfo) -> str:
+    return value.astimezone(timezone).strftime(DATE_TIME_FORMAT)
+
+
+def format_event(event: EventScheme, timezone: ZoneInfo) -> str:
+    description = event.description
+    if len(description) > MAX_DESCRIPTION_LENGTH:
+        description = description[: MAX_DESCRIPTION_LENGTH - 1] + "…"
+    return (
+        f"📅 ID:{event.id}\nОписание: {description}\nВремя события: {format_date_time(event.event_datetime, timezone)}\n"
+        f"Повтор: {event.repeat_interval.value if event.repeat_interval else 'однократное'}\n"
     )
+
+
+def _message_length(text: str) -> int:
+    """Длина текста так, как её считает Telegram: в UTF-16 code units."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def fit_events_page(
+    page: EventPageScheme, timezone: ZoneInfo, title: str, from_end: bool = False
+) -> tuple[str, EventPageScheme]:
+    """Текст страницы событий, помещающийся в одно сообщение, и страница с показанными событиями.
+
+    Не поместившиеся события убираются с конца страницы, а при листании назад (from_end)
+    с начала, и попадают на соседнюю страницу.
+    """
+    blocks = [format_event(event, timezone) for event in page.items]
+    indexes = range(len(blocks) - 1, -1, -1) if from_end else range(len(blocks))
+    length = _message_length(title)
+    kept = 0
+    for index in indexes:
+        length += _message_length(blocks[index]) + 1
+        if length > MessageLimit.MAX_TEXT_LENGTH:
+            break
+        kept += 1
+
+    if kept < len(blocks):
+        if from_end:
+            blocks, items = blocks[-kept:], page.items[-kept:]
+            page = replace(page, items=items, has_earlier=True)
+        else:
+            blocks, items = blocks[:kept], page.items[:kept]
+            page = replace(page, items=items, has_later=True)
+    return title + "\n".join(blocks), page
+
+
+def encode_page_key(event: EventScheme) -> str:
+    """Ключ пагинации (event_datetime, id) для callback_data: микросекунды от эпохи и id."""
+    return f"{(event.event_datetime - EPOCH) // timedelta(microseconds=1)}:{event.id}"
+
+
+def decode_page_key(value: str) -> tuple[datetime, int]:
+    microseconds, event_id = value.split(":")
+    return EPOCH + timedelta(microseconds=int(microseconds)), int(event_id)
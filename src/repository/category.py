@@ -3,6 +3,8 @@ from sqlalchemy import select
 from src.database import Category
 from src.repository.base import BaseRepository
 
+OTHER_CATEGORY_ALIAS = "прочее"
+
 
 class CategoryRepository(BaseRepository[Category]):
     """Репозиторий для работы с категориями."""
@@ -17,7 +19,7 @@ class CategoryRepository(BaseRepository[Category]):
         category = result.scalar_one_or_none()
 
         if not category:
-            stmt = select(Category).where(Category.aliases.has_key("прочее"))
+            stmt = select(Category).where(Category.aliases.has_key(OTHER_CATEGORY_ALIAS))
             result = await self.session.execute(stmt)
             category = result.scalar_one()
 
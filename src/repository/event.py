@@ -1,23 +1,134 @@
 from datetime import datetime
 from typing import Sequence
 
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Integer,
+    Interval,
+    Text,
+    any_,
+    bindparam,
+    case,
+    delete,
+    func,
+    literal,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.future import select
 
 from src.database.models import Event, User
+from src.reminders.schemes import DueEventScheme
 from src.repository.base import BaseRepository
 
 
+def occurrence_columns(now: datetime) -> tuple[ColumnElement[datetime], ColumnElement[datetime]]:
+    """Последнее наступившее повторение события и первое повторение после now.
+
+    Считается в запросе сразу для всех строк функциями event_repeat_step и
+    event_occurrences_passed. Повторения отсчитываются от исходной даты в часовом поясе
+    владельца, поэтому дни месяца не сползают, а время события не сдвигается при переходе
+    на летнее время. Для будущих и неповторяющихся событий последним повторением
+    считается сама дата события, следующего повторения у неповторяющихся нет.
+    Запрос должен быть соединён с User.
+    """
+    repeat_interval = Event.repeat_interval.cast(Text)
+    step = func.event_repeat_step(repeat_interval, type_=Interval)
+    local_datetime = func.timezone(User.timezone, Event.event_datetime, type_=DateTime)
+    local_now = func.timezone(User.timezone, literal(now, DateTime(timezone=True)), type_=DateTime)
+    passed = func.event_occurrences_passed(local_datetime, repeat_interval, local_now, type_=Integer)
+
+    def to_utc(local: ColumnElement[datetime]) -> ColumnElement[datetime]:
+        return func.timezone(User.timezone, local, type_=DateTime(timezone=True))
+
+    occurrence = case(
+        (Event.repeat_interval.is_(None), Event.event_datetime),
+        else_=to_utc(local_datetime + step * passed),
+    )
+    next_occurrence = to_utc(local_datetime + step * (passed + 1))
+    return occurrence.label("occurrence"), next_occurrence.label("next_occurrence")
+
+
 class EventRepository(BaseRepository[Event]):
     def __init__(self, session):
         super().__init__(session, Event)
 
-    async def get_events_by_datetime(self, start_datetime: datetime, end_datetime: datetime) -> Sequence[Event]:
-        query = select(Event).where(Event.event_datetime.between(start_datetime, end_datetime))
+    async def claim_due_events(self, window_end: datetime, limit: int, now: datetime) -> list[DueEventScheme]:
+        """Забирает пачку событий не позже window_end вместе с telegram_id владельца.
+
+        Граница в UTC, поэтому один проход охватывает пользователей из всех часовых поясов.
+        Строки блокируются до конца транзакции через FOR UPDATE SKIP LOCKED, поэтому
+        параллельные воркеры разбирают разные события. Для повторяющихся событий сразу
+        вычисляются последнее наступившее повторение и первое повторение после now,
+        см. occurrence_columns.
+        """
+        query = (
+            select(
+                Event.id,
+                Event.event_datetime,
+                Event.description,
+                Event.repeat_interval,
+                Event.message_count,
+                User.telegram_id,
+                *occurrence_columns(now),
+            )
+            .join(User)
+            .where(Event.event_datetime <= window_end)
+            .order_by(Event.event_datetime)
+            .limit(limit)
+            .with_for_update(of=Event, skip_locked=True)
+        )
         result = await self.session.execute(query)
-        return result.scalars().all()
+        return [DueEventScheme(*row) for row in result]
+
+    async def delete_by_ids(self, event_ids: list[int]):
+        """Удаляет события одним запросом DELETE ... WHERE id = ANY(:ids)."""
+        if not event_ids:
+            return
+        stmt = delete(Event).where(Event.id == any_(bindparam("event_ids", event_ids, type_=ARRAY(Integer))))
+        await self.session.execute(stmt)
+
+    async def reschedule(self, next_datetimes: dict[int, datetime]):
+        """Переносит события на новые даты одним UPDATE ... FROM.
+
+        Пары (id, дата) передаются двумя массивами и разворачиваются через unnest,
+        поэтому размер запроса не упирается в лимит параметров.
+        """
+        if not next_datetimes:
+            return
+        next_occurrence = func.unnest(
+            bindparam("event_ids", list(next_datetimes), type_=ARRAY(Integer)),
+            bindparam("event_datetimes", list(next_datetimes.values()), type_=ARRAY(DateTime(timezone=True))),
+        ).table_valued("id", "event_datetime").render_derived(name="next_occurrence")
+        stmt = (
+            update(Event)
+            .where(Event.id == next_occurrence.c.id)
+            .values(event_datetime=next_occurrence.c.event_datetime, updated_at=func.now())
+        )
+        await self.session.execute(stmt)
+
+    async def get_page_by_user_tg(
+        self,
+        user_tg_id: int,
+        after: tuple[datetime, int] | None = None,
+        before: tuple[datetime, int] | None = None,
+        limit: int = 10,
+    ) -> Sequence[Event]:
+        """Получает страницу событий пользователя по возрастанию даты.
 
-    async def get_all_by_user_tg(self, user_tg_id: int) -> Sequence[Event]:
-        """Получение списка событий для юзера по telegram_id."""
-        query = select(Event).join(User).where(User.telegram_id == user_tg_id)
+        Пагинация по ключу (event_datetime, id): after возвращает события позже указанного,
+        before - раньше. Запрашивается limit + 1 строка, лишняя говорит о наличии
+        следующей страницы в этом направлении.
+        """
+        key = tuple_(Event.event_datetime, Event.id)
+        query = select(Event).join(User).where(User.telegram_id == user_tg_id).limit(limit + 1)
+        if before is not None:
+            query = query.where(key < before).order_by(Event.event_datetime.desc(), Event.id.desc())
+        else:
+            if after is not None:
+                query = query.where(key > after)
+            query = query.order_by(Event.event_datetime.asc(), Event.id.asc())
         result = await self.session.execute(query)
         return result.scalars().all()
@@ -1,11 +1,19 @@
 from datetime import datetime
-from typing import Sequence
+from decimal import Decimal
+from typing import AsyncIterable
 
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import func, select, text
+from sqlalchemy import Date, Float, Numeric, Row, Text, delete, func, insert, literal, select, text, true
 
-from src.database import Category, Expense, User
+from src.database import Category, Expense, ExpenseMonthlyRollup, User
+from src.expense.schemes import ExpenseStatisticScheme, ExpenseTopScheme
 from src.repository.base import BaseRepository
+from src.repository.category import OTHER_CATEGORY_ALIAS
+from src.repository.user import UserRepository
+from src.utils import DEFAULT_TIMEZONE, get_zone
+
+# Часовой пояс, в котором триггеры раскладывают расходы по месяцам.
+ROLLUP_TIMEZONE = get_zone(DEFAULT_TIMEZONE)
 
 
 class ExpenseRepository(BaseRepository[Expense]):
@@ -14,54 +22,157 @@ class ExpenseRepository(BaseRepository[Expense]):
     def __init__(self, session):
         super().__init__(session, Expense)
 
+    async def add_by_category_alias(
+        self,
+        amount: float,
+        description: str | None,
+        category_alias: str,
+        user: User,
+        user_id: int | None = None,
+    ) -> Row:
+        """Добавляет расход одним SQL-запросом.
+
+        В одном CTE-запросе определяет категорию по псевдониму (с откатом на 'прочее'),
+        при неизвестном user_id создаёт или находит пользователя через upsert и вставляет расход.
+        Возвращает id, amount, user_id, category_id и category_name нового расхода.
+        """
+        has_alias = Category.aliases.has_key(category_alias)
+        category_cte = (
+            select(Category.id, Category.name)
+            .where(has_alias | Category.aliases.has_key(OTHER_CATEGORY_ALIAS))
+            .order_by(has_alias.desc())
+            .limit(1)
+            .cte("expense_category")
+        )
+
+        if user_id is None:
+            user_cte = UserRepository.build_upsert(user).cte("expense_user")
+            owner_id = user_cte.c.id
+            source = user_cte.join(category_cte, true())
+        else:
+            owner_id = literal(user_id)
+            source = category_cte
+
+        inserted_cte = (
+            insert(Expense)
+            .from_select(
+                ["amount", "description", "user_id", "category_id"],
+                select(
+                    literal(amount, Numeric(10, 2)),
+                    literal(description, Text),
+                    owner_id,
+                    category_cte.c.id,
+                ).select_from(source),
+                include_defaults=False,
+            )
+            .returning(Expense.id, Expense.amount, Expense.user_id, Expense.category_id)
+            .cte("inserted_expense")
+        )
+        stmt = select(
+            inserted_cte.c.id,
+            inserted_cte.c.amount,
+            inserted_cte.c.user_id,
+            inserted_cte.c.category_id,
+            category_cte.c.name.label("category_name"),
+        ).select_from(inserted_cte.join(category_cte, true()))
+
+        result = await self.session.execute(stmt)
+        return result.one()
+
+    async def delete_user_expense(self, expense_id: int, user_telegram_id: int) -> bool:
+        """Удаляет расход, если он принадлежит пользователю."""
+        stmt = (
+            delete(Expense)
+            .where(Expense.id == expense_id)
+            .where(Expense.user_id == select(User.id).where(User.telegram_id == user_telegram_id).scalar_subquery())
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount > 0
+
     async def get_statistics_by_months_count(
         self,
         user_telegram_id: int,
         months_count: int = 0,
-    ) -> Sequence[Expense]:
-        """Получает статистику расходов за указанное количество месяцев."""
-        date_range = (
-            datetime.now() + relativedelta(hour=0, minute=0, second=1, months=-months_count, day=1),
-            datetime.now() + relativedelta(hour=23, minute=59, second=59, day=31),
-        )
+    ) -> list[ExpenseStatisticScheme]:
+        """Получает статистику расходов за указанное количество месяцев из месячного агрегата.
+
+        Колонки выбираются как есть и сразу раскладываются в DTO, без сборки JSON в базе.
+        """
+        current_month = datetime.now(ROLLUP_TIMEZONE).date().replace(day=1)
+        first_month = current_month - relativedelta(months=months_count)
 
         stmt = (
-            select(
-                func.json_build_object(
-                    text("'amount', sum(expense.amount)"),
-                    text("'category_name', category.name"),
-                )
-            )
-            .select_from(Expense)
+            select(func.sum(ExpenseMonthlyRollup.amount).cast(Float), Category.name)
+            .select_from(ExpenseMonthlyRollup)
             .join(Category)
             .join(User)
             .where(User.telegram_id == user_telegram_id)
-            .where(Expense.created_at.between(date_range[0], date_range[1]))
+            .where(ExpenseMonthlyRollup.month.between(first_month, current_month))
             .group_by(Category.name)
+            .having(func.sum(ExpenseMonthlyRollup.expenses_count) > 0)
         )
 
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return [ExpenseStatisticScheme(amount, category_name) for amount, category_name in result]
 
-    async def get_top_expenses(self, user_telegram_id: int, count: int = 10) -> Sequence[Expense]:
-        """Получает топ-N расходов пользователя."""
-        stmt = (
-            select(
-                func.json_build_object(
-                    text("'id', expense.id"),
-                    text("'amount', expense.amount"),
-                    text("'category_name', category.name"),
-                    text("'created_at', expense.created_at"),
-                    text("'description', expense.description"),
-                )
+    async def rebuild_monthly_rollup(self):
+        """Пересобирает месячный агрегат расходов с нуля."""
+        # SHARE блокирует запись в expense до конца транзакции, чтобы триггеры не разошлись с пересборкой.
+        await self.session.execute(text("LOCK TABLE expense IN SHARE MODE"))
+        await self.session.execute(delete(ExpenseMonthlyRollup))
+        month = func.date_trunc("month", func.timezone(ROLLUP_TIMEZONE.key, Expense.created_at)).cast(Date)
+        await self.session.execute(
+            insert(ExpenseMonthlyRollup).from_select(
+                ["user_id", "category_id", "month", "amount", "expenses_count"],
+                select(Expense.user_id, Expense.category_id, month, func.sum(Expense.amount), func.count())
+                .group_by(Expense.user_id, Expense.category_id, month),
+                include_defaults=False,
             )
+        )
+
+    async def get_expenses_page(
+        self,
+        user_telegram_id: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 10,
+    ) -> list[ExpenseTopScheme]:
+        """Получает страницу расходов пользователя, от новых к старым.
+
+        Пагинация по ключу expense.id: before_id возвращает расходы старше указанного,
+        after_id - новее. Запрашивается limit + 1 строка, лишняя говорит о наличии
+        следующей страницы в этом направлении.
+        """
+        stmt = (
+            select(Expense.id, Expense.amount.cast(Float), Category.name, Expense.created_at, Expense.description)
             .select_from(Expense)
             .join(Category, Expense.category_id == Category.id)
             .join(User, Expense.user_id == User.id)
             .where(User.telegram_id == user_telegram_id)
-            .order_by(Expense.id.desc())
-            .limit(count)
+            .limit(limit + 1)
         )
+        if after_id is not None:
+            stmt = stmt.where(Expense.id > after_id).order_by(Expense.id.asc())
+        else:
+            if before_id is not None:
+                stmt = stmt.where(Expense.id < before_id)
+            stmt = stmt.order_by(Expense.id.desc())
 
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return [ExpenseTopScheme(*row) for row in result]
+
+    async def copy_expenses(self, records: AsyncIterable[tuple[Decimal, str | None, int, int, datetime]]) -> int:
+        """Загружает расходы через COPY в текущей транзакции.
+
+        records - кортежи (amount, description, user_id, category_id, created_at), читаются
+        потоково. Триггеры месячного агрегата срабатывают на COPY так же, как на INSERT.
+        Возвращает количество загруженных строк.
+        """
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        status = await raw_connection.driver_connection.copy_records_to_table(
+            Expense.__tablename__,
+            records=records,
+            columns=["amount", "description", "user_id", "category_id", "created_at"],
+        )
+        return int(status.split()[-1])
@@ -1,9 +1,20 @@
+import time
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
 
+from src.core.cache import LRUCache
 from src.database import User
 from src.repository.base import BaseRepository
+from src.utils import DEFAULT_TIMEZONE
+
+# telegram_id -> user.id, общий для всех сессий процесса.
+user_id_cache: LRUCache[int, int] = LRUCache(maxsize=10_000)
+# telegram_id -> (срок годности по time.monotonic, имя часового пояса пользователя).
+user_timezone_cache: LRUCache[int, tuple[float, str]] = LRUCache(maxsize=10_000)
+# Реплики бота не знают о смене пояса в другой реплике, поэтому запись живёт недолго.
+USER_TIMEZONE_TTL = 60
 
 
 class UserRepository(BaseRepository[User]):
@@ -17,8 +28,89 @@ class UserRepository(BaseRepository[User]):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def get_or_create_user_by_tg_id(self, current_user: User) -> User:
-        user = await self.get_user_by_tg_id(current_user.telegram_id)
-        if not user:
-            user = await self.add(current_user)
-        return user
+    @staticmethod
+    def build_upsert(current_user: User) -> Insert:
+        """INSERT ... ON CONFLICT (telegram_id) DO UPDATE, возвращающий id пользователя."""
+        stmt = insert(User).values(
+            telegram_id=current_user.telegram_id,
+            chat_id=current_user.chat_id,
+            name=current_user.name,
+            lastname=current_user.lastname,
+            is_active=True,
+            # Явные значения вместо python-side default, чтобы запрос можно было встроить в CTE.
+            created_at=func.now(),
+            updated_at=func.now(),
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                "name": stmt.excluded.name,
+                "lastname": stmt.excluded.lastname,
+                "updated_at": func.now(),
+            },
+        ).returning(User.id)
+
+    async def upsert_by_tg_id(self, current_user: User) -> int:
+        """Создаёт пользователя или обновляет имя существующего одним запросом, возвращает его id."""
+        result = await self.session.execute(self.build_upsert(current_user))
+        return result.scalar_one()
+
+    @staticmethod
+    def get_cached_user_id(telegram_id: int) -> int | None:
+        return user_id_cache.get(telegram_id)
+
+    def cache_user_id_on_commit(self, telegram_id: int, user_id: int):
+        """Кладёт id в кэш после коммита сессии.
+
+        В кэш попадают только закоммиченные пользователи, иначе после отката там останется
+        id несуществующей записи.
+        """
+        event.listen(
+            self.session.sync_session,
+            "after_commit",
+            lambda session: user_id_cache.set(telegram_id, user_id),
+            once=True,
+        )
+
+    async def get_or_create_user_id(self, current_user: User) -> int:
+        """Возвращает id пользователя по telegram_id, для известных пользователей без обращения к базе."""
+        user_id = self.get_cached_user_id(current_user.telegram_id)
+        if user_id is None:
+            user_id = await self.upsert_by_tg_id(current_user)
+            self.cache_user_id_on_commit(current_user.telegram_id, user_id)
+        return user_id
+
+    async def get_timezone(self, telegram_id: int) -> str:
+        """Часовой пояс пользователя, для незнакомых пользователей - часовой пояс по умолчанию."""
+        entry = user_timezone_cache.get(telegram_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        stmt = select(User.timezone).where(User.telegram_id == telegram_id)
+        timezone = (await self.session.execute(stmt)).scalar_one_or_none() or DEFAULT_TIMEZONE
+        user_timezone_cache.set(telegram_id, (time.monotonic() + USER_TIMEZONE_TTL, timezone))
+        return timezone
+
+    async def set_timezone(self, current_user: User) -> int:
+        """Сохраняет часовой пояс пользователя, создавая его при необходимости, возвращает id."""
+        stmt = insert(User).values(
+            telegram_id=current_user.telegram_id,
+            chat_id=current_user.chat_id,
+            name=current_user.name,
+            lastname=current_user.lastname,
+            timezone=current_user.timezone,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={"timezone": stmt.excluded.timezone, "updated_at": func.now()},
+        ).returning(User.id)
+        user_id = (await self.session.execute(stmt)).scalar_one()
+        self.cache_user_id_on_commit(current_user.telegram_id, user_id)
+        event.listen(
+            self.session.sync_session,
+            "after_commit",
+            lambda session: user_timezone_cache.set(
+                current_user.telegram_id, (time.monotonic() + USER_TIMEZONE_TTL, current_user.timezone)
+            ),
+            once=True,
+        )
+        return user_id
@@ -0,0 +1,96 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable
+from uuid import uuid4
+
+from arq.connections import ArqRedis
+from arq.constants import job_key_prefix, result_key_prefix
+from arq.jobs import serialize_job
+from arq.utils import timestamp_ms, to_unix_ms
+
+logger = logging.getLogger(__name__)
+
+# Сколько задач отправлять в Redis одним вызовом скрипта.
+ENQUEUE_BATCH_SIZE = 5_000
+
+# Атомарно ставит пачку задач, пропуская те, у которых уже есть запись задачи или результата,
+# как это делает ArqRedis.enqueue_job. ARGV: префикс задачи, префикс результата, очередь,
+# затем четвёрки job_id, payload, expires_ms, score. Возвращает количество поставленных задач.
+ENQUEUE_SCRIPT = """
+local enqueued = 0
+for i = 4, #ARGV, 4 do
+    local job_id = ARGV[i]
+    if redis.call('EXISTS', ARGV[1] .. job_id, ARGV[2] .. job_id) == 0 then
+        redis.call('PSETEX', ARGV[1] .. job_id, ARGV[i + 2], ARGV[i + 1])
+        redis.call('ZADD', ARGV[3], ARGV[i + 3], job_id)
+        enqueued = enqueued + 1
+    end
+end
+return enqueued
+"""
+
+
+@dataclass(slots=True, frozen=True)
+class JobSpec:
+    function: str
+    args: tuple[Any, ...]
+    defer_until: datetime | None = None
+    job_id: str | None = None
+
+
+@dataclass(slots=True)
+class EnqueueStats:
+    enqueued: int = 0
+    skipped: int = 0
+    duration: float = 0.0
+    batches: list[tuple[int, float]] = field(default_factory=list)
+
+
+async def _enqueue_batch(redis: ArqRedis, jobs: list[JobSpec], queue_name: str) -> int:
+    enqueue_time_ms = timestamp_ms()
+    args: list[Any] = [job_key_prefix, result_key_prefix, queue_name]
+    for job in jobs:
+        score = to_unix_ms(job.defer_until) if job.defer_until is not None else enqueue_time_ms
+        expires_ms = max(score - enqueue_time_ms, 0) + redis.expires_extra_ms
+        payload = serialize_job(job.function, job.args, {}, None, enqueue_time_ms, serializer=redis.job_serializer)
+        args.extend((job.job_id or uuid4().hex, payload, expires_ms, score))
+    return await redis.eval(ENQUEUE_SCRIPT, 0, *args)
+
+
+async def _flush(redis: ArqRedis, batch: list[JobSpec], queue_name: str, stats: EnqueueStats):
+    started = time.perf_counter()
+    enqueued = await _enqueue_batch(redis, batch, queue_name)
+    duration = time.perf_counter() - started
+    stats.enqueued += enqueued
+    stats.skipped += len(batch) - enqueued
+    stats.batches.append((enqueued, duration))
+    logger.info(f"Поставлено в очередь {enqueued} задач, уже были в очереди {len(batch) - enqueued}, за {duration:.3f} с.")
+
+
+async def enqueue_jobs(
+    redis: ArqRedis,
+    jobs: Iterable[JobSpec],
+    queue_name: str | None = None,
+    batch_size: int = ENQUEUE_BATCH_SIZE,
+) -> EnqueueStats:
+    """Ставит задачи arq в очередь пачками, по одному обращению к Redis на пачку.
+
+    Записи задачи и очереди те же, что делает ArqRedis.enqueue_job. Задачи с job_id,
+    для которого уже есть задача или результат, пропускаются, поэтому повторная
+    постановка тех же напоминаний после сбоя не создаёт дублей.
+    """
+    queue_name = queue_name or redis.default_queue_name
+    stats = EnqueueStats()
+    started = time.perf_counter()
+    batch: list[JobSpec] = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) >= batch_size:
+            await _flush(redis, batch, queue_name, stats)
+            batch = []
+    if batch:
+        await _flush(redis, batch, queue_name, stats)
+    stats.duration = time.perf_counter() - started
+    return stats
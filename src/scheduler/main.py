@@ -2,25 +2,45 @@ import logging
 
 from arq import create_pool, cron
 from arq.connections import RedisSettings
-from pytz import timezone
+from prometheus_client import start_http_server
 from telegram import Bot
 
 from src.configs import settings
-from src.scheduler.tasks import check_events, send_reminder
+from src.database import db_helper
+from src.scheduler import metrics
+from src.scheduler.rate_limit import TelegramRateLimiter
+from src.scheduler.tasks import check_events, get_redundant_sends, send_reminder
+from src.utils import DEFAULT_TIMEZONE, get_zone
 
 redis_settings = RedisSettings(host="redis")
 
 logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
 
+logger = logging.getLogger(__name__)
+
 
 async def startup(ctx):
-    ctx["bot"] = Bot(settings.bot.reminder_token)
+    db_helper.configure(settings.database.scheduler_pool)
+    await db_helper.warm_up()
+    ctx["bot"] = Bot(settings.bot.reminder_token, base_url=settings.bot.api_base_url)
     ctx["redis"] = await create_pool(redis_settings)
+    ctx["rate_limiter"] = TelegramRateLimiter(ctx["redis"], settings.scheduler.rate_limit)
+    metrics_settings = settings.scheduler.metrics
+    if metrics_settings.enabled:
+        ctx["metrics_server"], _ = start_http_server(
+            metrics_settings.port, metrics_settings.host, registry=metrics.registry
+        )
+        logger.info(f"Метрики доступны на http://{metrics_settings.host}:{metrics_settings.port}/metrics")
 
 
 async def shutdown(ctx):
+    logger.info(f"Повторных запусков send_reminder: {await get_redundant_sends(ctx['redis'])}")
+    if "metrics_server" in ctx:
+        ctx["metrics_server"].shutdown()
     await ctx["bot"].shutdown()
     await ctx["redis"].aclose()
+    logger.info(f"Состояние пула соединений: {db_helper.pool_stats()}")
+    await db_helper.dispose()
 
 
 class WorkerSettings:
@@ -28,5 +48,9 @@ class WorkerSettings:
     on_startup = startup
     on_shutdown = shutdown
     redis_settings = redis_settings
-    cron_jobs = [cron(check_events, second={1, 30})]
-    timezone = timezone("Europe/Moscow")
+    # arq берёт параметры воркера из __dict__ класса, поэтому отложить чтение через дескриптор
+    # нельзя: настройки читаются при импорте модуля, и ему нужно окружение планировщика.
+    max_tries = settings.scheduler.send_max_tries
+    # Проход запускается в каждом воркере: события делятся между ними через SKIP LOCKED.
+    cron_jobs = [cron(check_events, second={1, 30}, unique=False)]
+    timezone = get_zone(DEFAULT_TIMEZONE)
@@ -0,0 +1,42 @@
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from src.database.db_helper import PoolStatsCollector, db_helper
+
+# Задержка отправки считается от назначенного времени, поэтому корзины крупнее стандартных.
+LAG_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+registry = CollectorRegistry()
+registry.register(PoolStatsCollector(db_helper))
+
+check_events_duration = Histogram(
+    "reminder_check_events_duration_seconds",
+    "Длительность прохода check_events.",
+    buckets=LAG_BUCKETS,
+    registry=registry,
+)
+events_scanned = Counter("reminder_events_scanned_total", "Забранные проходами события.", registry=registry)
+jobs_enqueued = Counter("reminder_jobs_enqueued_total", "Поставленные в очередь задачи отправки.", registry=registry)
+jobs_deduplicated = Counter(
+    "reminder_jobs_deduplicated_total", "Задачи, пропущенные при постановке как уже поставленные.", registry=registry
+)
+enqueue_duration = Histogram(
+    "reminder_enqueue_duration_seconds", "Длительность постановки пачки задач в Redis.", registry=registry
+)
+send_duration = Histogram("reminder_send_duration_seconds", "Длительность вызова send_message.", registry=registry)
+send_errors = Counter(
+    "reminder_send_errors_total", "Ошибки отправки напоминаний по типу ошибки.", ["error_type"], registry=registry
+)
+send_lag = Histogram(
+    "reminder_send_lag_seconds",
+    "Задержка фактической отправки относительно назначенного времени.",
+    buckets=LAG_BUCKETS,
+    registry=registry,
+)
+send_deferred = Counter(
+    "reminder_send_deferred_total", "Отправки, отложенные ограничителем или RetryAfter.", ["reason"], registry=registry
+)
+redundant_sends = Counter(
+    "reminder_redundant_sends_total",
+    "Повторные запуски send_reminder для уже отправленного напоминания.",
+    registry=registry,
+)
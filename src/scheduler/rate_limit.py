@@ -0,0 +1,84 @@
+import time
+from typing import Callable
+
+from redis.asyncio import Redis
+
+from src.configs import RateLimitSettings
+
+# Два ведра токенов (общее для бота и отдельное для чата) и общая пауза после RetryAfter.
+# KEYS: пауза, общее ведро, ведро чата. ARGV: now_ms, rate и burst общего ведра, rate и burst ведра чата.
+# Токен списывается из обоих вёдер только если он есть в обоих. Возвращает 0, если отправлять
+# можно, иначе сколько миллисекунд подождать.
+TOKEN_BUCKET_SCRIPT = """
+local pause = redis.call('PTTL', KEYS[1])
+if pause > 0 then
+    return pause
+end
+
+local now = tonumber(ARGV[1])
+local function refill(key, rate, burst)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+end
+
+local global_rate, global_burst = tonumber(ARGV[2]), tonumber(ARGV[3])
+local chat_rate, chat_burst = tonumber(ARGV[4]), tonumber(ARGV[5])
+local global_tokens = refill(KEYS[2], global_rate, global_burst)
+local chat_tokens = refill(KEYS[3], chat_rate, chat_burst)
+
+local wait = 0
+if global_tokens < 1 then
+    wait = math.max(wait, math.ceil((1 - global_tokens) * 1000 / global_rate))
+end
+if chat_tokens < 1 then
+    wait = math.max(wait, math.ceil((1 - chat_tokens) * 1000 / chat_rate))
+end
+if wait == 0 then
+    global_tokens = global_tokens - 1
+    chat_tokens = chat_tokens - 1
+end
+
+redis.call('HSET', KEYS[2], 'tokens', global_tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[2], math.ceil(global_burst * 1000 / global_rate) + 1000)
+redis.call('HSET', KEYS[3], 'tokens', chat_tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[3], math.ceil(chat_burst * 1000 / chat_rate) + 1000)
+return wait
+"""
+
+
+class TelegramRateLimiter:
+    """Ограничитель отправки сообщений для всех процессов воркера.
+
+    Состояние хранится в Redis, поэтому лимиты общие для всех реплик. Время берётся
+    из clock, чтобы его можно было подменить.
+    """
+
+    def __init__(self, redis: Redis, rate_limit: RateLimitSettings, clock: Callable[[], float] = time.time):
+        self.redis = redis
+        self.settings = rate_limit
+        self.clock = clock
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def _keys(self, chat_id: int) -> list[str]:
+        prefix = self.settings.key_prefix
+        return [f"{prefix}:pause", f"{prefix}:global", f"{prefix}:chat:{chat_id}"]
+
+    async def acquire(self, chat_id: int) -> float:
+        """Пытается занять место под сообщение в чат. Возвращает 0 или сколько секунд подождать."""
+        wait_ms = await self._script(
+            keys=self._keys(chat_id),
+            args=[
+                int(self.clock() * 1000),
+                self.settings.global_rate,
+                self.settings.global_burst,
+                self.settings.chat_rate,
+                self.settings.chat_burst,
+            ],
+        )
+        return int(wait_ms) / 1000
+
+    async def pause(self, seconds: float):
+        """Останавливает отправку во всех процессах, например после RetryAfter от Telegram."""
+        await self.redis.set(self._keys(0)[0], 1, px=max(1, int(seconds * 1000)))
@@ -1,59 +1,208 @@
+import asyncio
 import logging
+import random
+import time
 from datetime import datetime, timedelta
 from typing import Any
 
+from arq import Retry
 from arq.connections import ArqRedis
 from telegram import Bot
+from telegram.error import RetryAfter
 
+from src.configs import settings
 from src.core.unitofwork import get_uow
-from src.scheduler.utils import calculate_next_occurrence
+from src.database import db_helper
+from src.reminders.schemes import DueEventScheme
+from src.scheduler import metrics
+from src.scheduler.enqueue import JobSpec, enqueue_jobs
+from src.scheduler.rate_limit import TelegramRateLimiter
+from src.utils import datetime_utc_now
 
 logger = logging.getLogger(__name__)
 
+REMINDER_SENT_KEY_PREFIX = "reminder:sent:"
+REMINDER_SENT_TTL = 2 * 24 * 60 * 60
+REMINDER_SENDING_KEY_PREFIX = "reminder:sending:"
+# Дольше любого запроса к Bot API: аренда не должна истечь посреди отправки.
+REMINDER_SENDING_TTL = 60
+REDUNDANT_SENDS_KEY = "reminder:redundant_sends"
+
+
+def reminder_job_id(event_id: int, occurrence: datetime, message_index: int) -> str:
+    """Детерминированный id задачи: повторная постановка того же напоминания не создаёт дубль."""
+    return f"reminder:{event_id}:{occurrence.isoformat()}:{message_index}"
+
+
+async def _wait_for_rate_limit(limiter: TelegramRateLimiter, chat_id: int):
+    """Ждёт своей очереди на отправку, долгое ожидание откладывает задачу arq."""
+    while wait := await limiter.acquire(chat_id):
+        if wait > settings.scheduler.rate_limit.max_inline_wait:
+            metrics.send_deferred.labels(reason="rate_limit").inc()
+            raise Retry(defer=wait + random.uniform(0, 1))
+        await asyncio.sleep(wait)
+
+
+async def _skip_redundant(redis: ArqRedis, job_id: str, event_id: int):
+    await redis.incr(REDUNDANT_SENDS_KEY)
+    metrics.redundant_sends.inc()
+    logger.warning(f"Напоминание id:{event_id} ({job_id}) уже отправлено, повтор пропущен.")
+
+
+async def send_reminder(
+    context: dict[str, Any],
+    user_tg_id: int,
+    event_id: int,
+    message: str,
+    scheduled_at: datetime | None = None,
+):
+    """Отправляет напоминание не больше одного раза на job_id.
+
+    Отметка об отправке ставится только после успешной отправки. На время отправки
+    берётся короткая аренда: параллельный запуск той же задачи откладывается, а если
+    воркер упал посреди отправки, аренда истекает и повтор задачи отправляет напоминание.
+    Задержка отправки считается от scheduled_at: score задачи сдвигается каждым Retry.
+    """
+    redis: ArqRedis = context["redis"]
+    limiter: TelegramRateLimiter = context["rate_limiter"]
+    sent_key = f"{REMINDER_SENT_KEY_PREFIX}{context['job_id']}"
+    sending_key = f"{REMINDER_SENDING_KEY_PREFIX}{context['job_id']}"
+    if await redis.exists(sent_key):
+        await _skip_redundant(redis, context["job_id"], event_id)
+        return
+
+    await _wait_for_rate_limit(limiter, user_tg_id)
+    if not await redis.set(sending_key, 1, nx=True, ex=REMINDER_SENDING_TTL):
+        metrics.send_deferred.labels(reason="sending").inc()
+        wait = max(await redis.pttl(sending_key), 0) / 1000
+        raise Retry(defer=wait + random.uniform(0, 1))
+
+    # Пока ждали ограничитель, напоминание мог отправить другой запуск задачи.
+    if await redis.exists(sent_key):
+        await redis.delete(sending_key)
+        await _skip_redundant(redis, context["job_id"], event_id)
+        return
 
-async def send_reminder(context: dict[str, Any], user_tg_id: int, event_id: int, message: str):
     bot: Bot = context["bot"]
-    await bot.send_message(user_tg_id, text=f"Напоминание: {message}")
+    started = time.perf_counter()
+    try:
+        await bot.send_message(user_tg_id, text=f"Напоминание: {message}")
+        await redis.set(sent_key, 1, ex=REMINDER_SENT_TTL)
+    except RetryAfter as error:
+        metrics.send_errors.labels(error_type=type(error).__name__).inc()
+        metrics.send_deferred.labels(reason="retry_after").inc()
+        retry_after = error.retry_after
+        seconds = retry_after.total_seconds() if isinstance(retry_after, timedelta) else retry_after
+        await limiter.pause(seconds)
+        logger.warning(f"Telegram ограничил отправку на {seconds} с, напоминание id:{event_id} отложено.")
+        raise Retry(defer=seconds + random.uniform(0, 1)) from error
+    except Exception as error:
+        metrics.send_errors.labels(error_type=type(error).__name__).inc()
+        raise
+    finally:
+        await redis.delete(sending_key)
+        metrics.send_duration.observe(time.perf_counter() - started)
+    # Задачи, поставленные до появления scheduled_at, в задержку не попадают.
+    if scheduled_at is not None:
+        metrics.send_lag.observe(max(0.0, (datetime_utc_now() - scheduled_at).total_seconds()))
     logger.info(f"Напоминание id:{event_id} отправленно пользователю(telegram_id: {user_tg_id})")
 
 
-async def check_events(context: dict[str, Any]):
-    try:
-        logger.info("Получение напоминаний.")
-        now = datetime.now()
-        period_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        period_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
-        redis: ArqRedis = context["redis"]
+async def get_redundant_sends(redis: ArqRedis) -> int:
+    """Сколько раз send_reminder запускался для уже отправленного напоминания."""
+    return int(await redis.get(REDUNDANT_SENDS_KEY) or 0)
+
+
+def reminder_schedule(event: DueEventScheme, stale_before: datetime) -> list[tuple[int, datetime]]:
+    """Номера и время сообщений напоминания о последнем наступившем повторении события.
+
+    Сообщения, опоздавшие дольше допустимого, отправляются по политике catch_up_policy:
+    только последнее из них или ни одного.
+    """
+    schedule = [
+        (count, event.occurrence + timedelta(hours=count, minutes=30) if count != 0 else event.occurrence)
+        for count in range(event.message_count)
+    ]
+    missed = [message for message in schedule if message[1] < stale_before]
+    if not missed:
+        return schedule
+    upcoming = schedule[len(missed) :]
+    if settings.scheduler.catch_up_policy == "send_latest":
+        return [missed[-1], *upcoming]
+    logger.info(f"Пропущено {len(missed)} опоздавших сообщений напоминания id: {event.id}.")
+    return upcoming
 
+
+async def process_due_events(
+    redis: ArqRedis,
+    window_end: datetime,
+    batch_size: int,
+    queue_name: str | None = None,
+) -> int:
+    """Разбирает пачками все необработанные события до window_end, каждая пачка в своей транзакции.
+
+    Обработанное событие удаляется или переносится на следующее повторение, поэтому
+    нижняя граница не нужна: события пачки, которая не зафиксировалась, в том числе
+    из-за падения воркера, подберёт следующий проход. Пачка забирается через SKIP LOCKED,
+    поэтому несколько воркеров делят события между собой. Возвращает количество
+    обработанных событий.
+    """
+    processed = 0
+    while True:
+        now = datetime_utc_now()
+        stale_before = now - timedelta(minutes=settings.scheduler.catch_up_grace_minutes)
         async with get_uow() as uow:
-            events = await uow.event.get_events_by_datetime(period_start, period_end)
-            logger.info(f"Полученно {len(events)} напоминаний.")
+            events = await uow.event.claim_due_events(window_end, batch_size, now)
+            finished_ids: list[int] = []
+            next_datetimes: dict[int, datetime] = {}
+            jobs: list[JobSpec] = []
             for event in events:
-                user = await uow.user.get_by_id(event.user_id)
-                for count in range(event.message_count):
-                    time_to_send = (
-                        event.event_datetime + timedelta(hours=count, minutes=30)
-                        if count != 0
-                        else event.event_datetime
+                for count, time_to_send in reminder_schedule(event, stale_before):
+                    jobs.append(
+                        JobSpec(
+                            "send_reminder",
+                            (event.user_telegram_id, event.id, event.description, time_to_send),
+                            time_to_send,
+                            reminder_job_id(event.id, event.occurrence, count),
+                        )
                     )
-                    await redis.enqueue_job(
-                        "send_reminder",
-                        user.telegram_id,
-                        event.id,
-                        event.description,
-                        _defer_until=time_to_send,
-                    )
-
-                    logger.info(
+                    logger.debug(
                         f"Напоминание id: {event.id} поставленна в очередь на отправку {time_to_send.date()} в {time_to_send.time()}."
                     )
                 if event.repeat_interval is None:
-                    await uow.event.delete(event.id)
+                    finished_ids.append(event.id)
                 else:
-                    next_occurrence = calculate_next_occurrence(event.event_datetime, event.repeat_interval)
-                    await uow.event.update(event.id, {"event_datetime": next_occurrence})
+                    next_datetimes[event.id] = event.next_occurrence
 
+            stats = await enqueue_jobs(redis, jobs, queue_name)
+            metrics.events_scanned.inc(len(events))
+            metrics.jobs_enqueued.inc(stats.enqueued)
+            metrics.jobs_deduplicated.inc(stats.skipped)
+            for _, duration in stats.batches:
+                metrics.enqueue_duration.observe(duration)
+            logger.info(
+                f"Получено {len(events)} напоминаний, поставлено в очередь {stats.enqueued} задач, "
+                f"пропущено уже поставленных {stats.skipped}, за {stats.duration:.3f} с."
+            )
+            await uow.event.delete_by_ids(finished_ids)
+            await uow.event.reschedule(next_datetimes)
             await uow.commit()
 
+        processed += len(events)
+        if len(events) < batch_size:
+            return processed
+
+
+async def check_events(context: dict[str, Any]):
+    try:
+        logger.info("Получение напоминаний.")
+        started = time.perf_counter()
+        redis: ArqRedis = context["redis"]
+        window_end = datetime_utc_now() + timedelta(minutes=settings.scheduler.lookahead_minutes)
+        processed = await process_due_events(redis, window_end, settings.scheduler.scan_batch_size)
+        metrics.check_events_duration.observe(time.perf_counter() - started)
+        logger.info(f"Обработано {processed} напоминаний до {window_end}.")
+        logger.debug(f"Состояние пула соединений: {db_helper.pool_stats()}")
+
     except Exception as e:
         logger.error(f"Ошибка при проверке событий: {e}")
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Hashable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class _ChatQueue:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Обрабатывает обновления разных чатов параллельно, а обновления одного чата по очереди.
+
+    Порядок внутри чата нужен ConversationHandler: состояние диалога меняется только после
+    обработки предыдущего сообщения. Одновременно выполняется не больше max_concurrent_handlers
+    обработчиков (по размеру пула соединений с базой). Обновления, ждущие свой чат, этот лимит
+    не занимают, поэтому пользователь, отправивший много сообщений подряд, не задерживает
+    остальных. max_pending_updates ограничивает число принятых, но ещё не обработанных обновлений.
+    """
+
+    __slots__ = ("_chats", "_handlers")
+
+    def __init__(self, max_concurrent_handlers: int, max_pending_updates: int):
+        super().__init__(max(max_pending_updates, max_concurrent_handlers))
+        self._handlers = asyncio.BoundedSemaphore(max_concurrent_handlers)
+        self._chats: dict[Hashable, _ChatQueue] = {}
+
+    @staticmethod
+    def _chat_key(update: object) -> Hashable | None:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return ("user", update.effective_user.id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._chat_key(update)
+        if key is None:
+            async with self._handlers:
+                await coroutine
+            return
+
+        # Lock и семафор asyncio отдают место в порядке ожидания, а задачи на обновления
+        # создаются в порядке их получения, поэтому порядок внутри чата сохраняется.
+        chat = self._chats.get(key)
+        if chat is None:
+            chat = self._chats[key] = _ChatQueue()
+        chat.pending += 1
+        try:
+            async with chat.lock, self._handlers:
+                await coroutine
+        finally:
+            chat.pending -= 1
+            if not chat.pending:
+                del self._chats[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
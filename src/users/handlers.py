@@ -0,0 +1,40 @@
+import logging
+from zoneinfo import ZoneInfoNotFoundError
+
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ContextTypes
+
+from src.users.service import get_user_timezone, set_user_timezone
+
+logger = logging.getLogger(__name__)
+
+TIMEZONE_HINT = "Чтобы изменить его, отправьте /timezone <часовой пояс>, например /timezone Asia/Yekaterinburg"
+
+
+async def timezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показывает часовой пояс пользователя или меняет его: /timezone Europe/Berlin."""
+    if not context.args:
+        zone = await get_user_timezone(update.effective_user.id)
+        await update.message.reply_text(f"Ваш часовой пояс: {zone.key}.\n{TIMEZONE_HINT}")
+        return
+
+    try:
+        zone = await set_user_timezone(
+            context.args[0],
+            update.effective_user.id,
+            update.effective_chat.id,
+            update.effective_user.first_name,
+            update.effective_user.last_name,
+        )
+    except (ZoneInfoNotFoundError, ValueError):
+        await update.message.reply_text(f"Неизвестный часовой пояс {context.args[0]}. ❌\n{TIMEZONE_HINT}")
+        return
+    except Exception as e:
+        logger.error(f"Ошибка при смене часового пояса: {e}")
+        await update.message.reply_text("Произошла ошибка при смене часового пояса. Попробуйте позже. ❌")
+        return
+    await update.message.reply_text(f"Часовой пояс изменён на {zone.key}. ✅")
+
+
+def register_user_handler(application: Application):
+    application.add_handler(CommandHandler("timezone", timezone_command))
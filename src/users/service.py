@@ -0,0 +1,36 @@
+from zoneinfo import ZoneInfo
+
+from src.core.unitofwork import get_uow
+from src.database.models import User
+from src.utils import get_zone
+
+
+async def get_user_timezone(user_telegram_id: int) -> ZoneInfo:
+    """Часовой пояс пользователя, для известных пользователей без обращения к базе."""
+    async with get_uow() as uow:
+        return get_zone(await uow.user.get_timezone(user_telegram_id))
+
+
+async def set_user_timezone(
+    timezone_name: str,
+    user_telegram_id: int,
+    chat_id: int,
+    firstname: str,
+    lastname: str | None,
+) -> ZoneInfo:
+    """Сохраняет часовой пояс пользователя.
+
+    Для неизвестного имени часового пояса пробрасывает ZoneInfoNotFoundError или ValueError.
+    """
+    zone = get_zone(timezone_name)
+    async with get_uow() as uow:
+        user = User(
+            telegram_id=user_telegram_id,
+            chat_id=chat_id,
+            name=firstname,
+            lastname=lastname,
+            timezone=zone.key,
+        )
+        await uow.user.set_timezone(user)
+        await uow.commit()
+    return zone
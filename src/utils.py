@@ -1,4 +1,8 @@
 from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = "Europe/Moscow"
 
 
 def datetime_utc_now() -> datetime:
@@ -6,6 +10,12 @@ def datetime_utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Часовой пояс по имени IANA, один объект на процесс для каждого имени."""
+    return ZoneInfo(name)
+
+
 def camel_case_to_snake_case(input_str: str) -> str:
     """
     >>> camel_case_to_snake_case("SomeSDK")
@@ -0,0 +1,18 @@
+import asyncio
+
+from src.core.cache import MemoryCacheBackend
+
+
+def test_memory_counters_are_bounded_and_never_reuse_versions():
+    async def scenario():
+        backend = MemoryCacheBackend(maxsize=2)
+        version = await backend.get_counter("a")
+        assert await backend.get_counter("a") == version
+        assert await backend.incr("a") == version + 1
+        await backend.incr("b")
+        await backend.incr("c")
+        assert len(backend._counters) == 2
+        # Счётчик "a" вытеснен: новая версия не совпадает ни с одной из прежних.
+        assert await backend.get_counter("a") > version + 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.configs import RateLimitSettings
+from src.scheduler.rate_limit import TelegramRateLimiter
+
+SETTINGS = RateLimitSettings(global_rate=10, global_burst=5, chat_rate=1, chat_burst=2)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def limiter(clock: Clock) -> TelegramRateLimiter:
+    # Скрипт ведра выполняется в fakeredis через lupa.
+    return TelegramRateLimiter(FakeAsyncRedis(), SETTINGS, clock)
+
+
+async def acquire_many(limiter: TelegramRateLimiter, chat_ids: list[int]) -> list[float]:
+    return [await limiter.acquire(chat_id) for chat_id in chat_ids]
+
+
+def test_chat_bucket_allows_burst_then_waits_for_refill(limiter: TelegramRateLimiter, clock: Clock):
+    async def scenario():
+        assert await acquire_many(limiter, [1, 1]) == [0, 0]
+        # Ведро чата пусто: токен накопится через 1 / chat_rate секунд.
+        assert await acquire_many(limiter, [1]) == [1.0]
+        # Другие чаты ограничены только общим ведром.
+        assert await acquire_many(limiter, [2]) == [0]
+        clock.now += 0.5
+        assert await acquire_many(limiter, [1]) == [0.5]
+        clock.now += 0.5
+        assert await acquire_many(limiter, [1]) == [0]
+
+    asyncio.run(scenario())
+
+
+def test_global_bucket_limits_all_chats(limiter: TelegramRateLimiter, clock: Clock):
+    async def scenario():
+        assert await acquire_many(limiter, [1, 2, 3, 4, 5]) == [0] * 5
+        # Общее ведро пусто: токен накопится через 1 / global_rate секунд.
+        assert await acquire_many(limiter, [6]) == [0.1]
+        clock.now += 0.1
+        assert await acquire_many(limiter, [6]) == [0]
+
+    asyncio.run(scenario())
+
+
+def test_refused_acquire_does_not_take_tokens(limiter: TelegramRateLimiter):
+    async def scenario():
+        assert await acquire_many(limiter, [1, 1, 1, 1]) == [0, 0, 1.0, 1.0]
+        # Отказы в чате 1 не израсходовали общее ведро.
+        assert await acquire_many(limiter, [2, 3, 4]) == [0, 0, 0]
+
+    asyncio.run(scenario())
+
+
+def test_pause_stops_every_chat(limiter: TelegramRateLimiter):
+    async def scenario():
+        await limiter.pause(5)
+        for wait in await acquire_many(limiter, [1, 2]):
+            assert 4.5 < wait <= 5
+
+    asyncio.run(scenario())
@@ -0,0 +1,27 @@
+import io
+from decimal import Decimal
+
+from src.expense.statement import RejectedRow, StatementRow, read_statement
+
+
+def _read(*rows: str) -> list[StatementRow | RejectedRow]:
+    return list(read_statement(io.StringIO("\n".join(("Дата;Сумма;Описание", *rows)) + "\n")))
+
+
+def test_debit_is_imported_as_positive_amount():
+    [row] = _read("2025-01-15;-1 234,50;Магазин")
+    assert isinstance(row, StatementRow)
+    assert row.amount == Decimal("1234.50")
+    assert row.description == "Магазин"
+
+
+def test_credit_is_rejected():
+    [row] = _read("2025-01-15;500,00;Зарплата")
+    assert isinstance(row, RejectedRow)
+    assert row.line == 2
+
+
+def test_non_finite_amounts_are_rejected():
+    rows = _read("2025-01-15;NaN;Магазин", "2025-01-15;Infinity;Магазин", "2025-01-15;-Infinity;Магазин")
+    assert all(isinstance(row, RejectedRow) for row in rows)
+    assert [row.line for row in rows] == [2, 3, 4]